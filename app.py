@@ -173,7 +173,7 @@ class GamePage(tk.Frame):
     def startGame(self):
         game = gm.Game()    
         board = bd.Board(game, inverting=True, inverted=False)
-        player1 = pr.Computer("Leandro", 0, pr.Fischer(3600), game, board, 2)
+        player1 = pr.Computer("Leandro", 0, pr.Fischer(3600), game, board, 32)
         #player1 = pr.Human("Leandro", 0, pr.Fischer(3600), game, board)
         player2 = pr.Human("Bruno", 1, pr.Fischer(3600), game, board)
 
@@ -0,0 +1,103 @@
+""" Static evaluation of many positions at once with NumPy, for analysis and datasets.
+
+	python batch.py --positions 10000
+
+A position is a row of 64 int8, the piece ``6*color + kind`` on each square or -1 if it is empty, or else
+12 planes of 64 squares, one per piece. Material and piece-square values, the kings' included, are read
+from the same tables as ``game.Game.evaluate_static`` and summed over every square of every row in one go.
+Run as a script, it plays random games and checks both paths agree. Needs NumPy, which the game does not.
+"""
+import game as gm
+# python libraries
+import argparse, random, sys, time
+import numpy as np
+
+EMPTY = 12
+
+# Value of each piece, and of an empty square, on each square from white's side, in the middle (0) and in
+# the end (1) game
+SCORES = np.zeros((2, EMPTY + 1, 64), dtype=np.int32)
+for phase in (0, 1):
+	for piece in range(12):
+		color, kind = divmod(piece, 6)
+		values = gm.EVAL_KINGS[phase][color] if kind == gm.KING else gm.EVAL_SQUARES[piece]
+		SCORES[phase, piece] = values if color else np.negative(values)
+
+def encode(games):
+	""" Return the squares of ``games`` as an (N, 64) int8 array, and whose turn it is as an (N,) int8 array. """
+	squares = np.full((len(games), 64), -1, dtype=np.int8)
+	turns = np.empty(len(games), dtype=np.int8)
+	for i, game in enumerate(games):
+		squares[i] = [-1 if piece is None else piece for piece in game.squares]
+		turns[i] = game.turn
+	return squares, turns
+
+def planes(squares):
+	""" Return (N, 64) ``squares`` as (N, 12, 64) bool planes, one per piece. """
+	return squares[:, None, :] == np.arange(12, dtype=np.int8)[None, :, None]
+
+def evaluate(positions, turns=None):
+	""" Return the material and piece-square score of each position from white's side, or from the side of
+	the player to move if ``turns`` is given, as an (N,) int32 array.
+
+	:param positions: an (N, 64) array of pieces or an (N, 12, 64) array of planes.
+	"""
+	positions = np.asarray(positions)
+	if positions.ndim == 3:
+		positions = np.where(positions.any(axis=1), positions.argmax(axis=1), -1)
+	pieces = np.where(positions < 0, EMPTY, positions).astype(np.intp)
+
+	# Kings use their end game table once 8 pieces or fewer are left
+	phase = (np.count_nonzero(pieces != EMPTY, axis=1) <= 8).astype(np.intp)
+	val = SCORES[phase[:, None], pieces, np.arange(64)].sum(axis=1, dtype=np.int32)
+
+	if turns is not None:
+		val = np.where(np.asarray(turns) == 1, val, -val)
+	return val
+
+def random_games(count, seed=0):
+	""" Return ``count`` positions reached by random legal moves from the initial one. """
+	rnd = random.Random(seed)
+	games = []
+	while len(games) < count:
+		game = gm.Game()
+		for ply in range(rnd.randrange(200)):
+			moves = [(frm, to) for frm, tos in game.get_all_moves_legal().items() for to in tos]
+			if not moves:
+				break
+			(x, y), (n, m) = rnd.choice(moves)
+			game.make_move(x, y, n, m, rnd.choice("NBRQ"))
+		games.append(game)
+	return games
+
+def check(games):
+	""" Compare the batch scores of ``games`` with ``evaluate_static``, in both encodings; return True if they match. """
+	squares, turns = encode(games)
+
+	start_time = time.perf_counter()
+	expected = np.array([game.evaluate_static() for game in games], dtype=np.int32)
+	time_scalar = time.perf_counter() - start_time
+
+	start_time = time.perf_counter()
+	val = evaluate(squares)
+	time_batch = time.perf_counter() - start_time
+
+	passed = True
+	for name, got in (("pieces", val), ("planes", evaluate(planes(squares))),
+					  ("turns", evaluate(squares, turns) * np.where(turns == 1, 1, -1))):
+		wrong = np.flatnonzero(got != expected)
+		if wrong.size:
+			passed = False
+			print("{:s}  FAILED: {:d} positions differ, first {:s}".format(name, wrong.size, games[wrong[0]].fen()))
+
+	print("positions {:d}  scalar {:.3f}s  batch {:.3f}s".format(len(games), time_scalar, time_batch))
+	return passed
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Check the batch evaluation against game.Game's.")
+	parser.add_argument("--positions", type=int, default=1000, help="random positions to compare")
+	parser.add_argument("--seed", type=int, default=0)
+	args = parser.parse_args()
+
+	sys.exit(0 if check(random_games(args.positions, args.seed)) else 1)
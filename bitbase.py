@@ -0,0 +1,237 @@
+""" Endgame bitbases[1]_ for king and pawn, rook or queen against king, generated by retrograde analysis[2]_.
+
+	python bitbase.py --generate
+	python bitbase.py --check
+
+Each ending is a file of two packed bit arrays, one for each side to move, with a bit set for every
+position the stronger side wins. Positions are indexed by the squares of the stronger king, its piece and
+the lonely king, as if the stronger side were white; black's are turned upside down. Generation is
+deterministic, so the files are rebuilt identically on any machine, and they are memory-mapped when probed.
+The check plays won endings out, engine against engine, to make sure they end in mate.
+
+[1] https://www.chessprogramming.org/Endgame_Bitbases
+[2] https://www.chessprogramming.org/Retrograde_Analysis
+"""
+import game as gm
+import engine as en
+# python libraries
+import argparse, collections, mmap, os, sys, time
+
+DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bitbases")
+
+# Endings in order of generation, as a pawn's promotion leads into the other two
+ENDINGS = {"kqk": gm.QUEEN, "krk": gm.ROOK, "kpk": gm.PAWN}
+
+# Positions for each side to move: the stronger king, its piece and the lonely king
+POSITIONS = 64*64*64
+
+# Score of a won ending, short of a mate, where a capture or a promotion enters it; the static evaluation is
+# added to tell such wins apart
+WIN = 5000
+
+# Won positions of each ending, which the engine must convert into a mate
+CONVERSIONS = {
+	"kqk": "8/8/3k4/8/8/8/8/4K2Q w - - 0 1",
+	"krk": "8/8/8/4k3/8/8/8/R3K3 w - - 0 1",
+	"kpk": "4k3/8/4K3/4P3/8/8/8/8 w - - 0 1",
+}
+
+def index(king_strong, piece, king_weak):
+	return (king_strong*64 + piece)*64 + king_weak
+
+def attacks(kind, sq, occupied):
+	""" Return the squares attacked by the stronger side's piece ``kind`` from ``sq``, the stronger side being white. """
+	if kind == gm.PAWN:
+		return gm.ATTACKS_PAWN[1][sq]
+	if kind == gm.ROOK:
+		return gm.attacks_rook(sq, occupied)
+	return gm.attacks_rook(sq, occupied) | gm.attacks_bishop(sq, occupied)
+
+def unmoves_piece(kind, sq, occupied):
+	""" Return the squares the stronger side's piece may have come from, short of a promotion. """
+	if kind != gm.PAWN:
+		return attacks(kind, sq, occupied) & ~occupied
+	sources = 1 << sq + 8 & ~occupied & ~gm.ROWS[7]
+	if sources and sq >> 3 == 4:
+		sources |= 1 << sq + 16 & ~occupied
+	return sources
+
+def generate(kind, promotions=()):
+	""" Return the bit arrays of the ending of king and ``kind`` against king, as a bytearray of wins for the
+	stronger side to move followed by one for the lonely king to move.
+
+	Every position of the lonely king to move counts its legal moves. Wins spread backwards from the mates,
+	and from the promotions won in ``promotions``, the bit arrays of the endings a pawn promotes into: a
+	position of the stronger side to move wins as soon as one move reaches a win, one of the lonely king
+	wins once all of its moves do.
+	"""
+	squares_piece = range(8, 56) if kind == gm.PAWN else range(64)
+	legal = bytearray(POSITIONS)		# stronger side to move and the lonely king out of check
+	win = [bytearray(POSITIONS), bytearray(POSITIONS)]		# [stronger side to move, lonely king to move]
+	count = bytearray(POSITIONS)		# legal moves left to refute, with the lonely king to move
+	queue = collections.deque()
+
+	for king_strong in range(64):
+		for piece in squares_piece:
+			if piece == king_strong: continue
+			for king_weak in range(64):
+				if king_weak in (king_strong, piece) or gm.ATTACKS_KING[king_strong] >> king_weak & 1: continue
+				i = index(king_strong, piece, king_weak)
+				occupied = 1 << king_strong | 1 << piece | 1 << king_weak
+				check = attacks(kind, piece, occupied) >> king_weak & 1
+				legal[i] = not check
+
+				# The lonely king's moves; taking an undefended piece draws, so it is counted but never refuted
+				occupied ^= 1 << king_weak
+				guarded = gm.ATTACKS_KING[king_strong] | attacks(kind, piece, occupied)
+				moves = gm.ATTACKS_KING[king_weak] & ~guarded
+				count[i] = gm.popcount(moves)
+				if count[i] == 0 and check:
+					win[1][i] = 1
+					queue.append((1, king_strong, piece, king_weak))
+
+				# A pawn promotes into a won ending
+				if kind == gm.PAWN and piece >> 3 == 1 and not check and not 1 << piece - 8 & occupied:
+					j = index(king_strong, piece - 8, king_weak)
+					if any(bits[POSITIONS + j >> 3] >> (POSITIONS + j & 7) & 1 for bits in promotions):
+						win[0][i] = 1
+						queue.append((0, king_strong, piece, king_weak))
+
+	while queue:
+		side, king_strong, piece, king_weak = queue.popleft()
+		occupied = 1 << king_strong | 1 << piece | 1 << king_weak
+
+		if side == 1:
+			# The stronger side moved into this won position: its king or its piece
+			predecessors = [index(frm, piece, king_weak) for frm in gm.scan(gm.ATTACKS_KING[king_strong]
+							& ~occupied & ~gm.ATTACKS_KING[king_weak])]
+			predecessors += [index(king_strong, frm, king_weak) for frm in gm.scan(unmoves_piece(kind, piece,
+							 occupied))]
+			for i in predecessors:
+				if legal[i] and not win[0][i]:
+					win[0][i] = 1
+					queue.append((0, i >> 12, i >> 6 & 63, i & 63))
+		else:
+			# The lonely king moved into this lost position; it is lost there once no move is left
+			for frm in gm.scan(gm.ATTACKS_KING[king_weak] & ~occupied & ~gm.ATTACKS_KING[king_strong]):
+				i = index(king_strong, piece, frm)
+				count[i] -= 1
+				if count[i] == 0 and not win[1][i]:
+					win[1][i] = 1
+					queue.append((1, king_strong, piece, frm))
+
+	return pack(win[0]) + pack(win[1])
+
+def pack(bits):
+	""" Return ``bits``, one per byte, packed eight per byte from the least significant bit. """
+	packed = bytearray(len(bits) // 8)
+	for i in range(0, len(bits), 8):
+		byte = 0
+		for j in range(8):
+			byte |= bits[i + j] << j
+		packed[i >> 3] = byte
+	return packed
+
+def generate_all(directory=DIRECTORY):
+	""" Generate every ending into ``directory``. """
+	os.makedirs(directory, exist_ok=True)
+	tables = {}
+	for name, kind in ENDINGS.items():
+		start_time = time.perf_counter()
+		promotions = (tables["kqk"], tables["krk"]) if kind == gm.PAWN else ()
+		tables[name] = generate(kind, promotions)
+		with open(os.path.join(directory, name + ".bin"), 'wb') as f:
+			f.write(tables[name])
+
+		wins = sum(bin(byte).count('1') for byte in tables[name])
+		print("{:s}  wins {:d}  time {:.1f}s".format(name, wins, time.perf_counter() - start_time))
+
+
+class Bitbases:
+	""" The generated endings found in ``directory``, memory-mapped; the missing ones are not probed.
+
+	:param directory: where the files were generated.
+	:type directory: str
+	"""
+	def __init__(self, directory=DIRECTORY):
+		self.tables = {}
+		for name, kind in ENDINGS.items():
+			path = os.path.join(directory, name + ".bin")
+			if os.path.exists(path):
+				with open(path, 'rb') as f:
+					self.tables[kind] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+	def probe(self, game):
+		""" Return the exact score of ``game``, seen by the player currently playing, if it is a known ending
+		of three pieces, or else None. King and minor piece against king is always a draw.
+		"""
+		occupied = game.occupied[0] | game.occupied[1]
+		if gm.popcount(occupied) != 3:
+			return None
+
+		piece = (occupied & ~game.bitboards[gm.KING] & ~game.bitboards[6 + gm.KING]).bit_length() - 1
+		color, kind = divmod(game.squares[piece], 6)
+		if kind in (gm.KNIGHT, gm.BISHOP):
+			return 0
+		if kind not in self.tables:
+			return None
+
+		king_strong = (game.bitboards[6*color + gm.KING]).bit_length() - 1
+		king_weak = (game.bitboards[6*(1 - color) + gm.KING]).bit_length() - 1
+		if not color:
+			king_strong, piece, king_weak = king_strong ^ 56, piece ^ 56, king_weak ^ 56
+
+		i = index(king_strong, piece, king_weak) + (0 if game.turn == color else POSITIONS)
+		if not self.tables[kind][i >> 3] >> (i & 7) & 1:
+			return 0
+
+		val = game.evaluate()
+		return WIN + val if game.turn == color else val - WIN
+
+	def close(self):
+		for table in self.tables.values():
+			table.close()
+
+def check(directory=DIRECTORY, seconds=0.5):
+	""" Play each of ``CONVERSIONS`` out, engine against engine with ``seconds`` a move and the bitbases of
+	``directory``; return True if white mates in every one.
+	"""
+	passed = True
+	for name, fen in CONVERSIONS.items():
+		engine = en.Engine()
+		engine.bitbases = Bitbases(directory)
+		if len(engine.bitbases.tables) < len(ENDINGS):
+			print("{:s}  FAILED: the bitbases are not generated in {:s}".format(name, directory))
+			return False
+
+		game = gm.Game.from_fen(fen)
+		status = game.checkmate()
+		while status == gm.Status.ONGOING:
+			val, moves_best = engine.search(game, seconds, seconds)
+			move = moves_best[-1]
+			game.make_move(*move[:4], move[4] if len(move) == 6 else 'Q')
+			status = game.checkmate()
+
+		plies = len(game.undo)
+		if status == gm.Status.CHECKMATE and not game.turn:
+			print("{:s}  mate in {:d} plies".format(name, plies))
+		else:
+			print("{:s}  FAILED: {:s} after {:d} plies".format(name, status.name.lower().replace('_', ' '), plies))
+			passed = False
+		engine.bitbases.close()
+	return passed
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Generate the endgame bitbases.")
+	parser.add_argument("--generate", action="store_true", help="build every ending")
+	parser.add_argument("--check", action="store_true", help="play won endings out and verify they are mated")
+	parser.add_argument("--directory", default=DIRECTORY)
+	args = parser.parse_args()
+
+	if args.generate:
+		generate_all(args.directory)
+	if args.check:
+		sys.exit(0 if check(args.directory) else 1)
+	if not args.generate:
+		parser.print_help()
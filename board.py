@@ -19,6 +19,54 @@ import time##
 KEY_WORDS = {'0': "black", '1': "white", 'P': "pawn", 'N': "knight",
 			 'B': "bishop", 'R': "rook", 'Q': "queen", 'K': "king"}
 
+class Sprites:
+	""" Board, piece and overlay images, loaded from disk, converted and scaled once and shared by every board.
+
+	Every square-sized image is kept in a single atlas surface[1]_ and handed out as a subsurface of it.
+
+	[1] https://en.wikipedia.org/wiki/Texture_atlas
+	"""
+	OVERLAYS = ("circle-green", "capture-green", "danger-radial", "square-reddish", "square-greenish", "fade")
+	shared = None
+
+	def __init__(self):
+		names = [KEY_WORDS[name] + '-' + KEY_WORDS[color] for color in "01" for name in gm.PIECES]
+		names += self.OVERLAYS
+
+		self.atlas = pygame.Surface((60*len(names), 60), pygame.SRCALPHA).convert_alpha()
+		self.tiles = {}
+		for i, name in enumerate(names):
+			image = pygame.transform.scale(self.load(name), (60, 60))
+			# Add onto the transparent atlas, so the image's alpha is copied instead of blended
+			self.atlas.blit(image, (60*i, 0), special_flags=pygame.BLEND_RGBA_ADD)
+			self.tiles[name] = self.atlas.subsurface((60*i, 0, 60, 60))
+
+		self.board		= pygame.transform.scale(   self.load("board-brown"), (480, 480))
+		self.bg_fade	= pygame.transform.scale(          self.load("fade"), (480, 480))
+		self.bg_white	= pygame.transform.scale(  self.load("square-white"), (140, 140))
+
+		self.circle		= self.tiles[   "circle-green"]
+		self.capture	= self.tiles[  "capture-green"]
+		self.danger		= self.tiles[  "danger-radial"]
+		self.current	= self.tiles[ "square-reddish"]
+		self.move		= self.tiles["square-greenish"]
+		self.fade		= self.tiles[           "fade"]
+
+	@classmethod
+	def get(cls):
+		""" Return the sprites shared by every board, building them on first use, once a display mode is set. """
+		if cls.shared is None:
+			cls.shared = cls()
+		return cls.shared
+
+	@staticmethod
+	def load(name):
+		return pygame.image.load("images/" + name + ".png").convert_alpha()
+
+	def piece(self, name, color):
+		""" Return the image of a piece given its name and color, as in the board's list view, e.g. 'Q', '1'. """
+		return self.tiles[KEY_WORDS[name] + '-' + KEY_WORDS[color]]
+
 class Board:
 	def __init__(self, game, inverting, inverted):
 		self.game = game
@@ -26,6 +74,8 @@ class Board:
 		self.inverted = inverted
 		
 		self.origin = self.destin = (8, 8)	# out of the board, where can't be seen
+		self.frame = {}		# what was drawn on each square in the last frame, empty to force a full redraw
+		self.flipped = None
 
 		pygame.init()
 		pygame.mixer.init()##troquei pelo de cima
@@ -38,24 +88,9 @@ class Board:
 		self.sound_move		= pygame.mixer.Sound(     "sounds/move.wav")
 		self.sound_capture	= pygame.mixer.Sound(  "sounds/capture.wav")
 		self.sound_dings	= pygame.mixer.Sound("sounds/ding-ding.wav")##nao está a fazer nada
-	
-		self.bg_fade		= pygame.image.load(           "images/fade.png")
-		self.bg_fade		= pygame.transform.scale(     self.bg_fade, (480, 480))
-		self.bg_white		= pygame.image.load(   "images/square-white.png")
-		self.bg_white		= pygame.transform.scale(    self.bg_white, (140, 140))
-		self.img_board		= pygame.image.load(    "images/board-brown.png")
-		self.img_board		= pygame.transform.scale(   self.img_board, (480, 480))
-		self.img_circle		= pygame.image.load(   "images/circle-green.png")
-		self.img_circle		= pygame.transform.scale(  self.img_circle, ( 60,  60))
-		self.img_capture	= pygame.image.load(  "images/capture-green.png")
-		self.img_capture	= pygame.transform.scale( self.img_capture, ( 60,  60))
-		self.img_danger		= pygame.image.load(  "images/danger-radial.png")
-		self.img_danger		= pygame.transform.scale(  self.img_danger, ( 60,  60))
-		self.img_current	= pygame.image.load( "images/square-reddish.png")
-		self.img_current	= pygame.transform.scale( self.img_current, ( 60,  60))
-		self.img_move		= pygame.image.load("images/square-greenish.png")
-		self.img_move		= pygame.transform.scale(    self.img_move, ( 60,  60))
-	
+
+		self.sprites = Sprites.get()
+
 	# When the input is a real position, returns the apparent position in board and vice versa.
 	def correctPos(self, pos, pixels=False):
 		x, y = pos
@@ -67,46 +102,71 @@ class Board:
 		return x, y
 
 	def update(self, current=(8, 8), moves_legal=[]):
+		""" Draw the board, redrawing only the squares whose content changed since the last frame[1]_.
+
+		Each square is described by its layers: last move, current selection, check, legal move mark and piece.
+		Everything is redrawn when the board is turned over or after an overlay covered the screen.
+
+		[1] https://www.pygame.org/docs/tut/newbieguide.html
+		"""
 		self.side = ((self.inverting and not self.inverted) or (self.game.turn and not self.inverting 
 					 and not self.inverted) or (not self.game.turn and not self.inverting and self.inverted))
 
-		self.screen.blit(  self.img_board, (0, 0))
-		self.screen.blit(   self.img_move, self.correctPos(self.origin, True))
-		self.screen.blit(   self.img_move, self.correctPos(self.destin, True))
-		self.screen.blit(self.img_current, self.correctPos(    current, True))
+		board = self.game.board
+		frame = {}
+		for x in range(8):
+			for y in range(8):
+				other = board[x][y]
+				frame[(x, y)] = [(x, y) in (self.origin, self.destin), (x, y) == current, False, None,
+								 None if other is None else (other[gm.NAME], other[gm.COLOR])]
 
 		if self.game.check():
-			pos_king = self.game.pos_kings[self.game.turn]
-			self.screen.blit(self.img_danger, self.correctPos(pos_king, True))
+			frame[tuple(self.game.pos_kings[self.game.turn])][2] = True
 
 		for (x, y) in moves_legal:
-			image = self.img_circle
-			if self.game.board[x][y] is not None:
-				image = self.img_capture
-
-			self.screen.blit(image, self.correctPos((x, y), True))
-
-		for x in range(8):
-			for y in range(8):
-				other = self.game.board[x][y]
-				if other is not None:
-					img_piece = pygame.image.load("images/" + KEY_WORDS[other[gm.NAME]] 
-													+ "-" + KEY_WORDS[other[gm.COLOR]] + ".png")
-					self.screen.blit(img_piece, self.correctPos((x, y), True))
-
-		pygame.display.flip()	# updates everything
+			frame[(x, y)][3] = "capture" if board[x][y] is not None else "circle"
+
+		flipped = self.side != self.game.turn
+		redraw_all = flipped != self.flipped or not self.frame
+		dirty = [pos for pos, layers in frame.items() if redraw_all or layers != self.frame[pos]]
+
+		sprites = self.sprites
+		rects = []
+		for pos in dirty:
+			move, selected, danger, mark, piece = frame[pos]
+			rect = pygame.Rect(self.correctPos(pos, True), (60, 60))
+
+			self.screen.blit(sprites.board, rect, rect)
+			if move:
+				self.screen.blit(   sprites.move, rect)
+			if selected:
+				self.screen.blit(sprites.current, rect)
+			if danger:
+				self.screen.blit( sprites.danger, rect)
+			if mark is not None:
+				self.screen.blit(sprites.capture if mark == "capture" else sprites.circle, rect)
+			if piece is not None:
+				self.screen.blit(sprites.piece(*piece), rect)
+			rects.append(rect)
+
+		self.frame = frame
+		self.flipped = flipped
+
+		if redraw_all:
+			pygame.display.flip()	# updates everything
+		elif rects:
+			pygame.display.update(rects)
 
 	def promote(self, x, y):
-		pawn = self.game.board[x][y]
+		pawn = self.game.get_piece(x, y)
 		promotion = ('Q', 'R', 'B', 'N')
+		sprites = self.sprites
 
-		self.screen.blit( self.bg_fade, (  0,   0))
-		self.screen.blit(self.bg_white, (170, 170))
+		self.screen.blit( sprites.bg_fade, (  0,   0))
+		self.screen.blit(sprites.bg_white, (170, 170))
 			
 		for i in range(4):
-			img_promotion = pygame.image.load("images/" + KEY_WORDS[promotion[i]] + "-" 
-												+ KEY_WORDS[pawn[gm.COLOR]] + ".png")
-			self.screen.blit(img_promotion, (180 + 60*(i % 2), 180 + 60*(i//2)) )
+			self.screen.blit(sprites.piece(promotion[i], pawn[gm.COLOR]), (180 + 60*(i % 2), 180 + 60*(i//2)) )
 		
 		pygame.display.flip()
 
@@ -120,20 +180,19 @@ class Board:
 					if 3 <= n <= 4 and 3 <= m <= 4:
 						for i in range(4):
 							if (180 + 60*(i % 2), 180 + 60*(i//2)) == (n*60, m*60):
-								self.game.board[x][y] = promotion[i] + pawn[gm.COLOR]
+								self.game.promote(x, y, promotion[i])
+						self.frame = {}		# the overlay covered the whole board
 						return
 
 				if event.type == pygame.MOUSEMOTION:
 					if (n, m) != (n0, m0):
-						self.screen.blit(self.bg_white, (170, 170))
+						self.screen.blit(sprites.bg_white, (170, 170))
 					
 						if 3 <= n <= 4 and 3 <= m <= 4:			
-							self.screen.blit( pygame.transform.scale(self.bg_fade, (60, 60)), (60*n, 60*m))
+							self.screen.blit(sprites.fade, (60*n, 60*m))
 					
 						for i in range(4):
-							img_promotion = pygame.image.load("images/" + KEY_WORDS[promotion[i]] + "-" 
-																+ KEY_WORDS[pawn[gm.COLOR]] + ".png")
-							self.screen.blit(img_promotion, (180 + 60*(i % 2), 180 + 60*(i//2)) )
+							self.screen.blit(sprites.piece(promotion[i], pawn[gm.COLOR]), (180 + 60*(i % 2), 180 + 60*(i//2)) )
 		
 						pygame.display.flip()
 
@@ -152,10 +211,9 @@ class Board:
 			player.play()
 
 			elapsed_time = time.time() - start_time; print("Elapsed Time:", elapsed_time)##
-			
-			self.game.turn = 0 if self.game.turn else 1
 
 			checkmate = self.game.checkmate()
-			self.game.over = True if checkmate else False
+			self.game.over = checkmate != gm.Status.ONGOING
 
-		print("Checkmate!" if checkmate == 1 else "Stalemate!")##
+		print({gm.Status.CHECKMATE: "Checkmate!", gm.Status.STALEMATE: "Stalemate!", gm.Status.REPETITION:
+			   "Draw by repetition!", gm.Status.FIFTY_MOVES: "Draw by the fifty-move rule!"}[checkmate])##
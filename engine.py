@@ -0,0 +1,645 @@
+""" Headless game tree search, usable from the board, from worker processes and from the command line.
+
+	python engine.py --depth 5 --workers 8
+	python engine.py --fen "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1" --depth 4
+"""
+import game as gm
+import transposition as tt
+import bitbase as bs
+# python libraries
+import argparse, concurrent.futures, multiprocessing, queue, threading, time
+
+# Largest gain a capture may bring beyond the captured piece's value, for delta pruning
+DELTA_MARGIN = 200
+
+def allocate(seconds, increment=0, moves_to_go=30):
+	""" Return the soft and hard time budgets[1]_, in seconds, for the next move given the time left on the clock.
+
+	The soft budget is a fair share of the remaining time plus most of the increment; no new
+	iteration should start after it. The hard budget caps a single move and keeps a reserve.
+
+	[1] https://www.chessprogramming.org/Time_Management
+	"""
+	reserve = min(1, seconds / 10)
+
+	time_soft = max(0, seconds - reserve) / max(1, moves_to_go) + 0.75*increment
+	time_hard = min(4*time_soft, max(0, seconds - reserve) / 3 + increment)
+	return min(time_soft, time_hard), time_hard
+
+def move_name(move):
+	""" Return the coordinate notation of a principal variation's move, e.g. "e7e8q". """
+	x, y, n, m = move[:4]
+	promotion = move[4].lower() if len(move) == 6 else ''
+	return gm.square_name(x, y) + gm.square_name(n, m) + promotion
+
+class Engine:
+	""" Iterative deepening negamax search with a transposition table, staged move ordering and quiescence.
+
+	With more than one worker, each iteration searches the first root move in this process and then splits
+	the others among a pool of processes[1]_, which only need to prove them no better than it (Young
+	Brothers Wait[2]_ at the root); threads would be serialized by the interpreter's lock.
+
+	[1] https://www.chessprogramming.org/Parallel_Search#Root_Splitting
+	[2] https://www.chessprogramming.org/Young_Brothers_Wait_Concept
+
+	:param depth_max: the deepest iteration to search.
+	:param table_size: the transposition table's memory budget in MB, for each process.
+	:param workers: the number of processes to search with.
+	"""
+	def __init__(self, depth_max=32, table_size=16, workers=1):
+		self.depth_max = depth_max
+		self.table_size = table_size
+		self.workers = workers
+		self.table = tt.TranspositionTable(table_size)
+		self.bitbases = bs.Bitbases()
+		self.moves_root = None		# the root moves to search, None for all of them
+		self.halted = False			# set by ``stop``, until the next search is asked for
+		self.pool = None
+		self.reset()
+
+	def reset(self):
+		""" Clear the statistics and the move ordering tables of the last search. """
+		self.no_nodes = [0] * self.depth_max##
+		self.no_nodes_quiescence = 0
+		self.no_hits = 0
+		self.table_killer = [[None, None] for i in range(self.depth_max)]
+		self.table_history = [[0] * 64 for piece in range(12)]
+		self.time_workers = 0
+
+	def close(self):
+		""" Shut the worker processes down. """
+		if self.pool is not None:
+			self.pool.shutdown()
+			self.pool = None
+
+	def search(self, game, time_soft, time_hard, info=None, depth=None):
+		""" Return the score and the principal variation, last move first, of the deepest finished iteration.
+
+		No iteration starts after ``time_soft`` seconds or beyond ``depth`` plies, and the search is abandoned
+		after ``time_hard``. ``info(depth, val, moves_best, elapsed_time)`` is called after each iteration.
+		"""
+		depth = self.depth_max if depth is None else min(depth, self.depth_max)
+		self.reset()
+		start_time = time.perf_counter()
+
+		if self.workers > 1 and self.split(game, 1)[-1]:
+			iterations = self.search_parallel(game.copy(), time_soft, time_hard, depth)
+		else:
+			iterations = self.iterate(game.copy(), time_soft, time_hard, depth)
+
+		val, moves_best = 0, []
+		for self.depth_final, val, moves_best in iterations:
+			if info is not None:
+				info(self.depth_final, val, moves_best, time.perf_counter() - start_time)
+
+		self.time = time.perf_counter() - start_time
+		return val, moves_best
+
+	def stop(self):
+		""" Make the search running in another thread return as soon as its first iteration is finished, even if
+		it has not started yet; clear ``halted`` before asking for the next one.
+		"""
+		self.halted = True
+		self.deadline = 0
+
+	def iterate(self, game, time_soft, time_hard, depth):
+		""" Search one ply deeper while the soft budget lasts[1]_, yielding (depth, val, moves_best) for each
+		iteration that the hard budget let finish.
+
+		[1] https://www.chessprogramming.org/Iterative_Deepening
+		"""
+		start_time = time.perf_counter()
+		self.deadline = 0 if self.halted else start_time + time_hard
+		self.stopped = False
+		self.table.new_search()
+
+		for self.depth_final in range(1, depth + 1):
+			val, moves_best = self.negamax(game)
+			if self.stopped:
+				break
+			yield self.depth_final, val, moves_best
+			if time.perf_counter() - start_time > time_soft:
+				break
+
+	def split(self, game, shares):
+		""" Return the root moves, best first by the table's move and the ordering tables, followed by the others
+		dealt round-robin into ``shares`` lists.
+		"""
+		entry = self.table.probe(game.key)
+		moves = [move[:4] for move in self.moves_ordered(game, 0, game.pins_checks(), entry and entry[4])]
+		return moves[:1] + [moves[1 + i::shares] for i in range(shares)]
+
+	def search_parallel(self, game, time_soft, time_hard, depth):
+		""" Search like ``iterate``, but at each depth search the first root move here with a full window and
+		hand its score to the workers as alpha, for them to search the other moves with a null window.
+		"""
+		if self.pool is None:
+			self.pool = concurrent.futures.ProcessPoolExecutor(self.workers)
+
+		start, start_time = time.time(), time.perf_counter()
+		self.deadline = 0 if self.halted else start_time + time_hard
+		self.stopped = False
+		self.table.new_search()
+
+		for self.depth_final in range(1, depth + 1):
+			move_first, *shares = self.split(game, self.workers)
+			self.moves_root = {move_first}
+			val, moves_best = self.negamax(game)
+			self.moves_root = None
+			if self.stopped:
+				break
+
+			futures = [self.pool.submit(search_root, game, share, self.depth_max, self.table_size, self.depth_final,
+										val, time_hard, start) for share in shares if share]
+			for future in futures:
+				result, stopped, statistics = future.result()
+				self.stopped |= stopped
+				if result is not None and result[0] > val:
+					val, moves_best = result
+
+				no_nodes, no_nodes_quiescence, no_hits, time_worker = statistics
+				self.no_nodes = [a + b for a, b in zip(self.no_nodes, no_nodes)]
+				self.no_nodes_quiescence += no_nodes_quiescence
+				self.no_hits += no_hits
+				self.time_workers += time_worker
+			if self.stopped:
+				break
+
+			# The best move of all, to search first here at the next depth
+			self.store(game, 0, -32768, 32767, val, moves_best)
+			yield self.depth_final, val, moves_best
+			if time.perf_counter() - start_time > time_soft:
+				break
+
+	def search_moves(self, game, moves, alpha):
+		""" Return the (val, moves_best) of the best of ``moves`` at the root if one beats ``alpha``, or else None.
+
+		Each move is searched with a null window[1]_ above alpha, and searched again with a full one if it
+		fails high; alpha rises with every move that beats it.
+
+		[1] https://www.chessprogramming.org/Null_Window
+		"""
+		best = None
+		for move in moves:
+			self.moves_root = {move}
+			val, moves_best = self.negamax(game, 0, alpha, alpha + 1)
+			if val > alpha and not self.stopped:
+				val, moves_best = self.negamax(game, 0, alpha, 32767)
+			if self.stopped:
+				break
+			if val > alpha:
+				alpha, best = val, (val, moves_best)
+		self.moves_root = None
+		return best
+
+	def statistics(self):
+		""" Return the node counts per depth, the quiescence nodes, the table hits and the search time. """
+		return self.no_nodes, self.no_nodes_quiescence, self.no_hits, self.time
+
+	def try_move(self, x, y, n, m, other, val_best, moves_best, game, depth, alpha, beta):
+		captured, promoted = game.make_move(x, y, n, m)
+
+		'''	Tree visualization.
+
+		notation = other[gm.NAME]
+		if captured:
+			if notation == 'P':
+				notation = chr(97 + x)
+			notation += 'x'
+		if notation == 'P':
+			notation = ''
+		print("{:s}{:4s}  ".format(' '*6*depth if self.flag else '', notation + chr(97 + n) + str(8 - m)), end='')
+		self.flag = False
+		'''
+
+		if promoted:
+			for promotion in ('N', 'B', 'R', 'Q'):
+				game.promote(n, m, promotion)
+
+				# recursiveness
+				val, moves = self.negamax(game, depth + 1, -beta, -alpha)
+				val = -val
+
+				''' Tree visualization.
+
+				print(" {:d}".format(val))
+				self.flag = True
+				'''
+
+				if val_best < val:
+					notation = other[gm.NAME]
+					if captured:
+						if notation == 'P':
+							notation = chr(97 + x)
+						notation += 'x'
+					if notation == 'P':
+						notation = ''
+					val_best = val
+					moves.append((x, y, n, m, promotion, notation))
+					moves_best = moves
+				alpha = max(alpha, val)
+				
+		else:
+			# recursiveness
+			val, moves = self.negamax(game, depth + 1, -beta, -alpha)
+			val = -val
+
+			''' Tree visualization.
+
+			print(" {:d}".format(val))
+			self.flag = True
+			'''
+			
+			if val_best < val:
+				notation = other[gm.NAME]
+				if captured:
+					if notation == 'P':
+						notation = chr(97 + x)
+					notation += 'x'
+				if notation == 'P':
+					notation = ''
+				val_best = val
+				moves.append((x, y, n, m, notation))
+				moves_best = moves
+			alpha = max(alpha, val)
+
+		game.unmake_move()
+
+		return val_best, moves_best, alpha, beta
+
+	def negamax(self, game, depth=0, alpha=-32768, beta=32767):
+		""" Find best move recursively using the negamax algorithm along side with modest optimizations. """
+		# Give up once the hard budget is spent, unless no iteration has finished yet
+		if self.stopped:
+			return 0, []
+		if self.depth_final > 1 and time.perf_counter() > self.deadline:
+			self.stopped = True
+			return 0, []
+
+		alpha_orig = alpha
+
+		# A position met before is a draw, whatever the table says, since it depends on the way there[1]_
+		# [1] https://www.chessprogramming.org/Repetitions
+		if depth != 0 and game.repetitions():
+			self.no_nodes[depth - 1] += 1
+			return 0, []
+
+		# Reuse the result of a transposition searched at least as deep, except at the root
+		entry = self.table.probe(game.key)
+		if entry is not None and depth != 0 and entry[1] >= self.depth_final - depth:
+			_, _, bound, val, move, _ = entry
+			if bound == tt.EXACT or (bound == tt.LOWER and val >= beta) or (bound == tt.UPPER and val <= alpha):
+				self.no_hits += 1
+				return val, [] if move is None else [move]
+
+		restrictions = game.pins_checks()
+		checkmate = game.checkmate(restrictions)
+		if checkmate == gm.Status.CHECKMATE:
+			self.no_nodes[depth - 1] += 1
+			return self.store(game, depth, alpha_orig, beta, game.evaluate() - 20000, [])
+		if checkmate == gm.Status.STALEMATE:
+			self.no_nodes[depth - 1] += 1
+			return self.store(game, depth, alpha_orig, beta, 0, [])
+		if checkmate == gm.Status.FIFTY_MOVES and depth != 0:
+			self.no_nodes[depth - 1] += 1
+			return 0, []
+
+		# The smallest endings are known exactly, except at the root, where a move must be found. A draw ends the
+		# search, but a win only where the ending is entered, by a capture or a promotion: inside it the search
+		# goes on, as a won score does not show the way to the mate
+		if depth != 0:
+			val = self.bitbases.probe(game)
+			if val:
+				_, to, _, capture = game.undo[-1][:4]
+				if game.halfmove != 0 or capture is None and 8 <= to < 56:
+					val = None
+			if val is not None:
+				self.no_nodes[depth - 1] += 1
+				return self.store(game, depth, alpha_orig, beta, val, [])
+		if depth == self.depth_final:
+			self.no_nodes[depth - 1] += 1
+			return self.store(game, depth, alpha_orig, beta, self.quiesce(game, alpha, beta), [])
+
+		val_best, moves_best = -32768, []
+		move_hash = None if entry is None else entry[4]
+
+		for x, y, n, m, quiet in self.moves_ordered(game, depth, restrictions, move_hash):
+			if depth == 0 and self.moves_root is not None and (x, y, n, m) not in self.moves_root:
+				continue
+			other = game.get_piece(x, y)
+			val_best, moves_best, alpha, beta = self.try_move(x, y, n, m, other, val_best, moves_best, 
+															  game, depth, alpha, beta)	
+			# alpha-beta prune
+			if alpha >= beta:
+				# Remember quiet moves that refute, for the siblings and for the whole search
+				if quiet:
+					moves_killer = self.table_killer[depth]
+					if moves_killer[0] != (x, y, n, m):
+						moves_killer[0], moves_killer[1] = (x, y, n, m), moves_killer[0]
+					self.table_history[game.squares[8*y + x]][8*m + n] += (self.depth_final - depth)**2
+				return self.store(game, depth, alpha_orig, beta, val_best, moves_best)
+
+		return self.store(game, depth, alpha_orig, beta, val_best, moves_best)
+
+	def moves_ordered(self, game, depth, restrictions, move_hash):
+		""" Yield the legal moves (x, y, n, m, quiet) of a node in stages[1]_, generating each stage when reached:
+		the hash move, winning captures and promotions by MVV-LVA[2]_, killer moves, quiet moves by history[3]_
+		and, at last, losing captures.
+
+		[1] https://www.chessprogramming.org/Move_Generation#Staged_Move_Generation
+		[2] https://www.chessprogramming.org/MVV-LVA
+		[3] https://www.chessprogramming.org/History_Heuristic
+		"""
+		squares = game.squares
+		turn = game.turn
+		enemy = 0 if turn else 1
+		targets = {}
+		moves_tried = set()
+
+		# Try the best move of an earlier search first
+		if move_hash is not None:
+			x, y, n, m = move_hash[:4]
+			piece = squares[8*y + x]
+			if piece is not None and piece // 6 == turn:
+				targets[8*y + x] = game.targets_legal(8*y + x, restrictions)
+				if targets[8*y + x] >> 8*m + n & 1:
+					moves_tried.add((x, y, n, m))
+					yield x, y, n, m, squares[8*m + n] is None and (piece % 6 != gm.PAWN or n == x and 0 < m < 7)
+
+		# Captures and promotions
+		moves_losing = []
+		for winning, _, _, sq, to in self.moves_tactical(game, restrictions, targets):
+			if not winning:
+				moves_losing.append((sq, to))
+				continue
+			move = (sq & 7, sq >> 3, to & 7, to >> 3)
+			if move not in moves_tried:
+				moves_tried.add(move)
+				yield move + (False,)
+
+		# Killer moves, as long as they are quiet and legal here
+		for move in self.table_killer[depth]:
+			if move is None or move in moves_tried: continue
+			x, y, n, m = move
+			piece = squares[8*y + x]
+			if piece is None or piece // 6 != turn or squares[8*m + n] is not None: continue
+			if piece % 6 == gm.PAWN and (n != x or m in (0, 7)): continue
+
+			if 8*y + x not in targets:
+				targets[8*y + x] = game.targets_legal(8*y + x, restrictions)
+			if targets[8*y + x] >> 8*m + n & 1:
+				moves_tried.add(move)
+				yield move + (True,)
+
+		# Quiet moves, the ones that refuted most often first
+		row_last = gm.ROWS[0 if turn else 7]
+		victims = game.occupied[enemy]
+
+		moves_quiet = []
+		for sq in gm.scan(game.occupied[turn]):
+			piece = squares[sq]
+			if sq not in targets:
+				targets[sq] = game.targets_legal(sq, restrictions)
+			quiets = targets[sq] & ~victims
+			# A pawn's targets off its file are all captures, en passant included
+			if piece % 6 == gm.PAWN:
+				quiets &= gm.FILES[sq & 7] & ~row_last
+			history = self.table_history[piece]
+			for to in gm.scan(quiets):
+				moves_quiet.append((history[to], sq, to))
+		moves_quiet.sort(reverse=True)
+
+		for _, sq, to in moves_quiet:
+			move = (sq & 7, sq >> 3, to & 7, to >> 3)
+			if move not in moves_tried:
+				yield move + (True,)
+
+		for sq, to in moves_losing:
+			move = (sq & 7, sq >> 3, to & 7, to >> 3)
+			if move not in moves_tried:
+				yield move + (False,)
+
+	def moves_tactical(self, game, restrictions, targets):
+		""" Return the legal captures and promotions as (winning, value, -kind, origin, destination), best first.
+
+		Candidates are found among the pieces' attacks, so only pieces that have one generate their legal
+		targets, which are kept in ``targets`` for later use.
+		"""
+		squares = game.squares
+		turn = game.turn
+		enemy = 0 if turn else 1
+		row_last = gm.ROWS[0 if turn else 7]
+		victims = game.occupied[enemy]
+		# Only a pawn takes on the en passant square
+		victims_pawn = victims if game.en_passant is None else victims | 1 << game.en_passant
+
+		moves_tactical = []
+		attacked = None		# the enemy's attack map, looked up for the first capture that may lose
+		for sq in gm.scan(game.occupied[turn]):
+			kind = squares[sq] % 6
+			if kind == gm.PAWN:
+				candidates = game.moves_atk(sq) & victims_pawn | game.moves_neutral(sq) & row_last
+			else:
+				candidates = game.moves_atk(sq) & victims
+			if not candidates: continue
+
+			if sq not in targets:
+				targets[sq] = game.targets_legal(sq, restrictions)
+			for to in gm.scan(targets[sq] & candidates):
+				victim = squares[to]
+				value = gm.VALUES[gm.PAWN if victim is None else victim % 6]
+				if kind == gm.PAWN and to & row_last:
+					value += gm.VALUES[gm.QUEEN]
+				# Giving up a piece for a lesser one loses material if the square is defended
+				losing = False
+				if value < gm.VALUES[kind]:
+					if attacked is None:
+						attacked = game.attack_maps()[enemy][1]
+					losing = attacked >> to & 1
+				moves_tactical.append((not losing, value, -kind, sq, to))
+		moves_tactical.sort(reverse=True)
+		return moves_tactical
+
+	def quiesce(self, game, alpha, beta):
+		""" Search captures and promotions only, until the position is quiet[1]_.
+
+		The side to move may stand pat on the static evaluation, except when in check, where every
+		evasion is searched. Captures that cannot lift the score near alpha are skipped (delta pruning[2]_),
+		and so are captures that lose material.
+
+		[1] https://www.chessprogramming.org/Quiescence_Search
+		[2] https://www.chessprogramming.org/Delta_Pruning
+		"""
+		self.no_nodes_quiescence += 1
+		if self.stopped:
+			return 0
+		if self.depth_final > 1 and time.perf_counter() > self.deadline:
+			self.stopped = True
+			return 0
+
+		restrictions = game.pins_checks()
+		check = restrictions[0] != gm.FULL
+		targets = {}
+
+		if check:
+			val_best = val_stand = -32768
+			moves = [(True, 0, 0, sq, to) for sq in gm.scan(game.occupied[game.turn])
+					 for to in gm.scan(game.targets_legal(sq, restrictions))]
+			if not moves:
+				return game.evaluate() - 20000
+		else:
+			# Stand pat
+			val_best = val_stand = game.evaluate()
+			if val_stand >= beta:
+				return val_stand
+			alpha = max(alpha, val_stand)
+			moves = self.moves_tactical(game, restrictions, targets)
+
+		for winning, value, _, sq, to in moves:
+			if not check and (not winning or val_stand + value + DELTA_MARGIN < alpha):
+				continue
+
+			game.make_move(sq & 7, sq >> 3, to & 7, to >> 3)
+			val = -self.quiesce(game, -beta, -alpha)
+			game.unmake_move()
+
+			if val > val_best:
+				val_best = val
+			if val >= beta:
+				return val
+			alpha = max(alpha, val)
+
+		return val_best
+
+	def store(self, game, depth, alpha, beta, val, moves):
+		""" Save the result of a search in the transposition table and return it. """
+		if self.stopped:
+			return val, moves
+		if val <= alpha:
+			bound = tt.UPPER
+		elif val >= beta:
+			bound = tt.LOWER
+		else:
+			bound = tt.EXACT
+		self.table.store(game.key, self.depth_final - depth, bound, val, moves[-1] if moves else None)
+		return val, moves
+
+
+# The engine of a worker process, kept between searches so that its tables last
+engine_worker = None
+
+def search_root(game, moves, depth_max, table_size, depth, alpha, time_hard, start):
+	""" Search ``moves`` of ``game`` to ``depth`` in a worker process, ``start`` being the time the search was
+	asked for; return the best one that beats ``alpha`` as (val, moves_best) or None, whether the hard budget
+	ran out first, and the statistics.
+	"""
+	global engine_worker
+	if engine_worker is None or (engine_worker.depth_max, engine_worker.table_size) != (depth_max, table_size):
+		engine_worker = Engine(depth_max, table_size)
+
+	# The ordering tables last for the whole search, the statistics only for this share
+	if depth == 1:
+		engine_worker.reset()
+		engine_worker.table.new_search()
+	else:
+		engine_worker.no_nodes = [0] * depth_max
+		engine_worker.no_nodes_quiescence = engine_worker.no_hits = 0
+	start_time = time.perf_counter()
+	engine_worker.deadline = start_time + time_hard - (time.time() - start)
+	engine_worker.stopped = False
+	engine_worker.depth_final = depth
+
+	result = engine_worker.search_moves(game, moves, alpha)
+	engine_worker.time = time.perf_counter() - start_time
+	return result, engine_worker.stopped, engine_worker.statistics()
+
+def ponder(game, depth_max, table_size, stop, results):
+	""" Search ``game`` in a background process until ``stop`` is set, putting every finished iteration in
+	``results`` and then None.
+	"""
+	engine = Engine(depth_max, table_size)
+	threading.Thread(target=lambda: (stop.wait(), engine.stop()), daemon=True).start()
+
+	for iteration in engine.iterate(game, float("inf"), float("inf"), depth_max):
+		results.put(iteration)
+	results.put(None)
+
+class Ponder:
+	""" A search of the position expected after the opponent's move, run in a background process while the
+	opponent thinks[1]_.
+
+	[1] https://www.chessprogramming.org/Pondering
+
+	:param game: the expected position.
+	"""
+	def __init__(self, game, depth_max=32, table_size=16):
+		self.key = game.key
+		self.iterations = []
+		self.done = False
+		self.stop = multiprocessing.Event()
+		self.results = multiprocessing.Queue()
+		self.start_time = time.perf_counter()
+		self.process = multiprocessing.Process(target=ponder, args=(game, depth_max, table_size, self.stop,
+											   self.results), daemon=True)
+		self.process.start()
+
+	def collect(self, timeout):
+		""" Keep the iterations finished so far, waiting up to ``timeout`` seconds for the next one. """
+		try:
+			while not self.done:
+				iteration = self.results.get(timeout=max(0, timeout))
+				if iteration is None:
+					self.done = True
+				else:
+					self.iterations.append(iteration)
+				timeout = 0
+		except queue.Empty:
+			pass
+
+	def finish(self, time_soft, time_hard):
+		""" Return the (depth, val, moves_best) of the deepest iteration on a ponder hit, once the search has
+		lasted ``time_soft`` seconds since it started pondering, and at most ``time_hard`` from now.
+		"""
+		now = time.perf_counter()
+		deadline_soft, deadline_hard = max(now, self.start_time + time_soft), now + time_hard
+		while not self.done:
+			deadline = deadline_soft if self.iterations else deadline_hard
+			if time.perf_counter() >= deadline:
+				break
+			self.collect(deadline - time.perf_counter())
+
+		self.cancel()
+		return self.iterations[-1] if self.iterations else None
+
+	def cancel(self):
+		""" Stop the search and wait for its process to end. """
+		self.stop.set()
+		while not self.done and self.process.is_alive():
+			self.collect(1)
+		self.process.join()
+
+def benchmark(fen, depth, workers):
+	""" Search ``fen`` to ``depth`` in a single process and then with ``workers`` processes, printing the time
+	each took and the speedup of the parallel search.
+	"""
+	times = []
+	for n in (1, workers):
+		engine = Engine(depth, workers=n)
+		val, moves_best = engine.search(gm.Game.from_fen(fen), float("inf"), float("inf"))
+		engine.close()
+		times.append(engine.time)
+
+		print("workers {:d}  val {:d}  move {:s}  nodes {:d}  time {:.2f}s".format(n, val,
+			  move_name(moves_best[-1]),
+			  sum(engine.no_nodes) + engine.no_nodes_quiescence, engine.time))
+
+	print("speedup {:.2f}".format(times[0] / times[1] if times[1] > 0 else 0))
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Time-to-depth of the single process and the parallel search.")
+	parser.add_argument("--fen", default="rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1")
+	parser.add_argument("--depth", type=int, default=4)
+	parser.add_argument("--workers", type=int, default=4)
+	args = parser.parse_args()
+
+	benchmark(args.fen, args.depth, args.workers)
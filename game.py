@@ -1,20 +1,168 @@
-# python libraries
-import pygame, time, copy
 import tables
+# python libraries
+import enum, random
 
 # global variables
 NAME = 0; COLOR = 1; EN_PASSANT = 2; HAS_MOVED = 2
 
+class Status(enum.IntEnum):
+	""" State of the game for the player currently playing. """
+	ONGOING = 0; CHECKMATE = 1; STALEMATE = 2; REPETITION = 3; FIFTY_MOVES = 4
+
+# Pieces are indexed by ``6*color + kind``, so bitboards[0:6] are black and bitboards[6:12] are white
+PIECES = "PNBRQK"
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+# Square ``8*y + x`` maps to board[x][y]: bit 0 is a8 and bit 63 is h1
+FULL = 0xFFFFFFFFFFFFFFFF
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+NOT_FILE_A = FULL ^ FILE_A
+NOT_FILE_H = FULL ^ FILE_H
+NOT_FILE_AB = NOT_FILE_A & (FULL ^ FILE_A << 1)
+NOT_FILE_GH = NOT_FILE_H & (FULL ^ FILE_H >> 1)
+FILES = [FILE_A << x for x in range(8)]
+FILES_ADJACENT = [(FILES[x - 1] if x > 0 else 0) | (FILES[x + 1] if x < 7 else 0) for x in range(8)]
+ROWS = [0xFF << 8*y for y in range(8)]
+
+# (shift, mask) pairs; the mask drops the squares that would wrap around the board's edge
+STEPS_KNIGHT = ((-17, NOT_FILE_A), (-15, NOT_FILE_H), (-10, NOT_FILE_AB), (-6, NOT_FILE_GH),
+				(  6, NOT_FILE_AB), ( 10, NOT_FILE_GH), ( 15, NOT_FILE_A), (17, NOT_FILE_H))
+STEPS_KING = ((-9, NOT_FILE_A), (-8, FULL), (-7, NOT_FILE_H), (-1, NOT_FILE_A),
+			  ( 1, NOT_FILE_H), ( 7, NOT_FILE_A), ( 8, FULL), ( 9, NOT_FILE_H))
+STEPS_BISHOP = ((-9, NOT_FILE_A), (-7, NOT_FILE_H), (7, NOT_FILE_A), (9, NOT_FILE_H))
+STEPS_ROOK = ((-8, FULL), (-1, NOT_FILE_A), (1, NOT_FILE_H), (8, FULL))
+STEPS_PAWN = (((7, NOT_FILE_A), (9, NOT_FILE_H)), ((-9, NOT_FILE_A), (-7, NOT_FILE_H)))
+
+# Castling rights, one bit per (color, side); side 0 is the queen side and side 1 the king side
+CASTLE_BLACK_QUEEN, CASTLE_BLACK_KING, CASTLE_WHITE_QUEEN, CASTLE_WHITE_KING = 1, 2, 4, 8
+CASTLE_KEEP = [15] * 64
+CASTLE_KEEP[0], CASTLE_KEEP[4], CASTLE_KEEP[7] = 15 ^ 1, 15 ^ 3, 15 ^ 2
+CASTLE_KEEP[56], CASTLE_KEEP[60], CASTLE_KEEP[63] = 15 ^ 4, 15 ^ 12, 15 ^ 8
+
+VALUES = tables.VALUES
+
+def eval_square(table, color, sq):
+	""" Return the value of ``table`` for a piece of ``color`` on ``sq``, as seen from its own side. """
+	x, y = sq & 7, sq >> 3
+	return table[y][x] if color else table[7 - y][7 - x]
+
+# Material plus piece-square value of each piece on each square; kings are left out, since their
+# table depends on the phase of the game
+EVAL_SQUARES = [[VALUES[kind] + eval_square(table, color, sq) for sq in range(64)]
+				for color in (0, 1)
+				for kind, table in enumerate((tables.EVAL_PAWN, tables.EVAL_KNIGHT, tables.EVAL_BISHOP,
+											  tables.EVAL_ROOK, tables.EVAL_QUEEN, [[0]*8]*8))]
+# King's piece-square value of each color on each square, in the middle (0) and in the end (1) game
+EVAL_KINGS = [[[eval_square(table, color, sq) for sq in range(64)] for color in (0, 1)]
+			  for table in (tables.EVAL_KING_MIDDLE, tables.EVAL_KING_END)]
+
+# Zobrist keys[1]_, drawn from a fixed seed so that hashes are the same between runs
+# [1] https://www.chessprogramming.org/Zobrist_Hashing
+_random = random.Random(0x5EED)
+ZOBRIST_PIECES = [[_random.getrandbits(64) for sq in range(64)] for piece in range(12)]
+ZOBRIST_CASTLING = [_random.getrandbits(64) for castling in range(16)]
+ZOBRIST_EN_PASSANT = [_random.getrandbits(64) for x in range(8)]
+ZOBRIST_TURN = _random.getrandbits(64)
+
+# Pawn structure scores by pawn key[1]_, direct-mapped: each slot keeps the last (key, score) stored in it
+# [1] https://www.chessprogramming.org/Pawn_Hash_Table
+PAWN_TABLE_MASK = (1 << 14) - 1
+pawn_table = [None] * (PAWN_TABLE_MASK + 1)
+
+
+def popcount(bb):
+	""" Return the number of set bits. """
+	return bin(bb).count('1')
+
+def scan(bb):
+	""" Yield the square of every set bit, from a8 to h1. """
+	while bb:
+		bit = bb & -bb
+		yield bit.bit_length() - 1
+		bb ^= bit
+
+def shift(bb, steps):
+	""" Return the union of ``bb`` moved once along each step. """
+	moved = 0
+	for s, mask in steps:
+		moved |= (bb & mask) << s & FULL if s > 0 else (bb & mask) >> -s
+	return moved
+
+def slide(bb, empty, steps):
+	""" Return the squares reached by sliding ``bb`` along each step until blocked[1]_.
+
+	[1] https://www.chessprogramming.org/Dumb7Fill
+	"""
+	attacks = 0
+	for s, mask in steps:
+		ray = bb
+		while ray:
+			ray = (ray & mask) << s & FULL if s > 0 else (ray & mask) >> -s
+			attacks |= ray
+			ray &= empty
+	return attacks
+
+# Attack tables[1]_, computed once: the squares each piece attacks from each square on an empty board
+# [1] https://www.chessprogramming.org/Classical_Approach
+ATTACKS_KNIGHT = [shift(1 << sq, STEPS_KNIGHT) for sq in range(64)]
+ATTACKS_KING = [shift(1 << sq, STEPS_KING) for sq in range(64)]
+ATTACKS_PAWN = [[shift(1 << sq, STEPS_PAWN[color]) for sq in range(64)] for color in (0, 1)]
+RAYS = {s: [slide(1 << sq, FULL, ((s, mask),)) for sq in range(64)] for s, mask in STEPS_KING}
+
+def attacks_slider(sq, occupied, steps):
+	""" Return the squares attacked from ``sq`` along the rays of ``steps``, up to the first piece on each. """
+	attacks = 0
+	for s, _ in steps:
+		ray = RAYS[s][sq]
+		blockers = ray & occupied
+		if blockers:
+			# the nearest piece is the lowest bit on rays going up, and the highest on rays going down
+			if s > 0:
+				blockers &= -blockers
+			ray ^= RAYS[s][blockers.bit_length() - 1]
+		attacks |= ray
+	return attacks
+
+def attacks_bishop(sq, occupied):
+	""" Return the squares attacked diagonally from ``sq``. """
+	return attacks_slider(sq, occupied, STEPS_BISHOP)
+
+def attacks_rook(sq, occupied):
+	""" Return the squares attacked along the row and the file of ``sq``. """
+	return attacks_slider(sq, occupied, STEPS_ROOK)
+
+def between(sq, to):
+	""" Return the squares strictly between two squares on the same row, file or diagonal, and 0 otherwise. """
+	for s, _ in STEPS_KING:
+		if RAYS[s][sq] >> to & 1:
+			return RAYS[s][sq] & ~RAYS[s][to] & ~(1 << to)
+	return 0
+
+BETWEEN = [[between(sq, to) for to in range(64)] for sq in range(64)]
+
+def square_name(x, y):
+	""" Return the algebraic name of the square (x, y), e.g. "e4". """
+	return chr(97 + x) + str(8 - y)
+
+def square_pos(name):
+	""" Return the position (x, y) of the square named ``name``. """
+	return ord(name[0]) - 97, 8 - int(name[1])
+
+
 class Game:
-	""" A representation of the chess game. 
-	
+	""" A representation of the chess game.
+
+	The position is kept in twelve bitboards, one per piece and color, along with a square-indexed
+	list of pieces. ``board`` rebuilds the 8x8 list view from them.
+
 	:param turn: a representation of the player currently playing; 0 for black and 1 for white.
 	:type turn: int
 	:param board: the set of pieces listed according its position.
 	:type board: list[str | None]
 	:param pos_kings: the white and black kings position
 	:type pos_kings: list[(int, int)]
-	"""	
+	"""
 	def __init__(self, turn=None, board=None, pos_kings=None):
 		assert turn == board == pos_kings == None or (turn != None and board != None and pos_kings != None)
 
@@ -26,7 +174,7 @@ class Game:
 			self.turn = turn
 
 		if board is None:
-			self.board = [
+			board = [
 				["R00", "P00", None, None, None, None, "P10", "R10"],
 				["N0" , "P00", None, None, None, None, "P10", "N1" ],
 				["B0" , "P00", None, None, None, None, "P10", "B1" ],
@@ -36,104 +184,378 @@ class Game:
 				["N0" , "P00", None, None, None, None, "P10", "N1" ],
 				["R00", "P00", None, None, None, None, "P10", "R10"],
 			]
-		else:
-			self.board = board
 
-		if pos_kings is None:
-			self.pos_kings = [(4, 0), (4, 7)]
-		else:
-			self.pos_kings = pos_kings
+		self.bitboards = [0] * 12
+		self.occupied = [0, 0]
+		self.squares = [None] * 64
+		self.castling = 0
+		self.en_passant = None
+		self.pos_kings = [None, None]
+		self.undo = []
+		self.key = 0
+		self.key_pawns = 0	# zobrist key of the pawns alone
+		self.score = [0, 0]
+		self.halfmove = 0	# plies since the last capture or pawn move
+		self.fullmove = 1
+		self.maps, self.maps_key = None, None
 
-	def make_move(self, x, y, n, m):
-		""" Fix pieces' position and attributes after a move. """
+		for x in range(8):
+			for y in range(8):
+				other = board[x][y]
+				if other is None: continue
+
+				color = int(other[COLOR])
+				self.put(8*y + x, 6*color + PIECES.index(other[NAME]))
+
+				if other[NAME] == 'P' and other[EN_PASSANT] == '1':
+					self.en_passant = 8*(y + 1 if color else y - 1) + x
+				elif other[NAME] == 'K':
+					self.pos_kings[color] = (x, y)
+
+		# A side may castle while neither its king nor the corresponding rook have moved
+		for color in (0, 1):
+			y = 7*color
+			if board[4][y] != 'K' + str(color) + '0':
+				continue
+			for side, x in ((0, 0), (1, 7)):
+				if board[x][y] == 'R' + str(color) + '0':
+					self.castling |= 1 << (2*color + side)
+
+		if pos_kings is not None:
+			self.pos_kings = list(pos_kings)
+
+		self.key ^= ZOBRIST_CASTLING[self.castling]
+		if self.en_passant is not None:
+			self.key ^= ZOBRIST_EN_PASSANT[self.en_passant & 7]
+		if self.turn:
+			self.key ^= ZOBRIST_TURN
+
+	@classmethod
+	def from_fen(cls, fen):
+		""" Return the game described by a FEN[1]_ record.
+
+		[1] https://www.chessprogramming.org/Forsyth-Edwards_Notation
+		"""
+		fields = fen.split()
+		board = [[None] * 8 for x in range(8)]
+		pos_kings = [None, None]
+
+		for y, row in enumerate(fields[0].split('/')):
+			x = 0
+			for char in row:
+				if char.isdigit():
+					x += int(char)
+					continue
+				name, color = char.upper(), str(int(char.isupper()))
+				board[x][y] = name + color + ('1' if name in "RK" else '0' if name == 'P' else '')
+				if name == 'K':
+					pos_kings[int(color)] = (x, y)
+				x += 1
+
+		turn = 1 if fields[1] == 'w' else 0
+
+		# Rights are read back from kings and rooks that have not moved
+		for char, x, y in (('K', 7, 7), ('Q', 0, 7), ('k', 7, 0), ('q', 0, 0)):
+			if char in fields[2]:
+				board[4][y] = board[4][y][:HAS_MOVED] + '0'
+				board[x][y] = board[x][y][:HAS_MOVED] + '0'
+
+		# The pawn that just advanced two squares stands past the en passant square
+		if fields[3] != '-':
+			x, y = square_pos(fields[3])
+			y += 1 if y == 2 else -1
+			board[x][y] = board[x][y][:EN_PASSANT] + '1'
+
+		game = cls(turn, board, pos_kings)
+		if len(fields) > 5:
+			game.halfmove, game.fullmove = int(fields[4]), int(fields[5])
+		return game
+
+	def fen(self):
+		""" Return the FEN record of the position. """
+		rows = []
+		for y in range(8):
+			row, empty = '', 0
+			for x in range(8):
+				piece = self.squares[8*y + x]
+				if piece is None:
+					empty += 1
+					continue
+				if empty:
+					row, empty = row + str(empty), 0
+				color, kind = divmod(piece, 6)
+				row += PIECES[kind] if color else PIECES[kind].lower()
+			rows.append(row + str(empty) if empty else row)
+
+		castling = ''.join(char for char, bit in zip("KQkq", (8, 4, 2, 1)) if self.castling & bit)
+		en_passant = '-' if self.en_passant is None else square_name(self.en_passant & 7, self.en_passant >> 3)
+		return ' '.join(('/'.join(rows), 'w' if self.turn else 'b', castling or '-', en_passant,
+						 str(self.halfmove), str(self.fullmove)))
+
+	@property
+	def board(self):
+		""" Return the 8x8 list view of the position, as read by ``board.Board``.
+
+		:rtype: list[list[str | None]]
+		"""
+		return [[self.get_piece(x, y) for y in range(8)] for x in range(8)]
+
+	def get_piece(self, x, y):
+		""" Return the list view of the piece at (x, y), e.g. "P10", or None if empty. """
+		piece = self.squares[8*y + x]
+		if piece is None:
+			return None
+
+		color, kind = divmod(piece, 6)
+		name = PIECES[kind] + str(color)
+
+		if kind == PAWN:
+			return name + ('1' if self.en_passant == 8*(y + 1 if color else y - 1) + x else '0')
+		if kind == ROOK:
+			corner = y == 7*color and x in (0, 7)
+			return name + ('0' if corner and self.castling & 1 << (2*color + x//7) else '1')
+		if kind == KING:
+			return name + ('0' if self.castling & 3 << 2*color else '1')
+		return name
+
+	def copy(self):
+		""" Return an independent copy of the game. """
+		game = Game.__new__(Game)
+		game.over = self.over
+		game.turn = self.turn
+		game.bitboards = list(self.bitboards)
+		game.occupied = list(self.occupied)
+		game.squares = list(self.squares)
+		game.castling = self.castling
+		game.en_passant = self.en_passant
+		game.pos_kings = list(self.pos_kings)
+		game.undo = list(self.undo)
+		game.key = self.key
+		game.key_pawns = self.key_pawns
+		game.score = list(self.score)
+		game.halfmove = self.halfmove
+		game.fullmove = self.fullmove
+		game.maps, game.maps_key = self.maps, self.maps_key
+		return game
+
+	def put(self, sq, piece):
+		""" Place ``piece`` on the empty square ``sq``. """
+		bit = 1 << sq
+		self.bitboards[piece] |= bit
+		self.occupied[piece >= 6] |= bit
+		self.squares[sq] = piece
+		self.key ^= ZOBRIST_PIECES[piece][sq]
+		if piece % 6 == PAWN:
+			self.key_pawns ^= ZOBRIST_PIECES[piece][sq]
+		self.score[piece >= 6] += EVAL_SQUARES[piece][sq]
+
+	def remove(self, sq):
+		""" Clear the square ``sq`` and return the piece that was on it. """
+		piece = self.squares[sq]
+		bit = 1 << sq
+		self.bitboards[piece] ^= bit
+		self.occupied[piece >= 6] ^= bit
+		self.squares[sq] = None
+		self.key ^= ZOBRIST_PIECES[piece][sq]
+		if piece % 6 == PAWN:
+			self.key_pawns ^= ZOBRIST_PIECES[piece][sq]
+		self.score[piece >= 6] -= EVAL_SQUARES[piece][sq]
+		return piece
+
+	def make_move(self, x, y, n, m, promotion='Q'):
+		""" Fix pieces' position and attributes after a move, and pass the turn.
+
+		A pawn reaching the last row becomes ``promotion``; use ``promote`` to change it afterwards.
+		Every move pushes an undo record[1]_ so ``unmake_move`` can take it back; the records' keys are also
+		the history of positions that ``repetitions`` looks through.
+
+		[1] (origin, destination, moved piece, captured piece, en passant square, castling rights, king position,
+			 zobrist key, halfmove clock)
+		"""
+		frm, to = 8*y + x, 8*m + n
+		piece = self.squares[frm]
+		color, kind = divmod(piece, 6)
 		captured = promoted = False
-
-		if self.board[n][m] is not None:
+		en_passant = None
+
+		# An enemy pawn captured en passant sits beside the destination
+		sq = to
+		if kind == PAWN and to == self.en_passant and n != x:
+			sq = to + 8 if color else to - 8
+
+		capture = self.squares[sq]
+		self.undo.append((frm, to, piece, capture, self.en_passant, self.castling, self.pos_kings[color], self.key,
+						  self.halfmove))
+		self.halfmove = 0 if kind == PAWN or capture is not None else self.halfmove + 1
+		self.fullmove += not color
+
+		# Acknowledge capture
+		if capture is not None:
+			self.remove(sq)
 			captured = True
 
-		# Make move	
-		piece = self.board[x][y]
-		self.board[x][y] = None
-		self.board[n][m] = piece
-
-		assert piece is not None
-
-		if piece[NAME] == 'P':
-			# Set pawn's ``en_passant`` attribute to True
-			if m == 3 + self.turn:
-				self.board[n][m] = piece[:EN_PASSANT] + '1'
-
-			# Remove enemy pawns that were captured en passent
-			# Acknowledge capture
-			other = self.board[n][m - (-1)**self.turn]
-			if other is not None and other[NAME] == 'P' and other[EN_PASSANT] == '1':
-				self.board[n][m - (-1)**self.turn] = None
-				captured = True
-			
+		# Make move
+		self.remove(frm)
+
+		if kind == PAWN:
+			# Register the square behind a two-square advance
+			if abs(to - frm) == 16:
+				en_passant = (frm + to) // 2
+
 			# Acknowledge promotion
-			if m == 7*(not self.turn):
+			if m == 7*(not color):
+				piece = 6*color + PIECES.index(promotion)
 				promoted = True
 
-		elif piece[NAME] == 'R':
-			self.board[n][m] = piece[:HAS_MOVED] + '1'
-
-		elif piece[NAME] == 'K':
-			if piece[HAS_MOVED] == '0':
-				# Swap rook with king
-				if n == 2:
-					rook = self.board[0][7*self.turn]
-					self.board[0][7*self.turn] = None
-					self.board[3][7*self.turn] = rook
-				elif n == 6:
-					rook = self.board[7][7*self.turn]
-					self.board[7][7*self.turn] = None
-					self.board[5][7*self.turn] = rook
-			self.board[n][m] = piece[:HAS_MOVED] + '1'
-			self.pos_kings[self.turn] = (n, m)
-
-		# Rechange enemy pawns' attribute ``en_passant`` to False
-		for x in range(8):
-			other = self.board[x][3 + (not self.turn)]
-			if other is not None and other[NAME] == 'P' and other[COLOR] != piece[COLOR]:
-				self.board[x][3 + (not self.turn)] = other[:EN_PASSANT] + '0'
+		elif kind == KING:
+			# Swap rook with king
+			if n - x == -2:
+				self.put(to + 1, self.remove(to - 2))
+			elif n - x == 2:
+				self.put(to - 1, self.remove(to + 1))
+			self.pos_kings[color] = (n, m)
+
+		self.put(to, piece)
+
+		# Update the position's key along with the remaining attributes
+		key = self.key ^ ZOBRIST_CASTLING[self.castling] ^ ZOBRIST_TURN
+		if self.en_passant is not None:
+			key ^= ZOBRIST_EN_PASSANT[self.en_passant & 7]
+		if en_passant is not None:
+			key ^= ZOBRIST_EN_PASSANT[en_passant & 7]
+
+		self.en_passant = en_passant
+		self.castling &= CASTLE_KEEP[frm] & CASTLE_KEEP[to]
+		self.key = key ^ ZOBRIST_CASTLING[self.castling]
+		self.turn = 0 if color else 1
 
 		return captured, promoted
 
-	def get_moves_legal(self, x, y):
-		""" Return a list with allowed moves for one piece. """
-		# Remove piece from ``board`` and verify if king is being attacked
-		moves_legal = set()
-		moves = self.get_moves(x, y)
+	def unmake_move(self):
+		""" Take back the last move made, restoring the position from its undo record. """
+		frm, to, piece, capture, en_passant, castling, pos_king, key, self.halfmove = self.undo.pop()
+		color, kind = divmod(piece, 6)
+
+		self.remove(to)
+		self.put(frm, piece)
+
+		if capture is not None:
+			# A pawn captured en passant sat beside the destination
+			if kind == PAWN and to == en_passant and (to - frm) % 8:
+				self.put(to + 8 if color else to - 8, capture)
+			else:
+				self.put(to, capture)
+		elif kind == KING:
+			# Swap rook back
+			if to - frm == -2:
+				self.put(to - 2, self.remove(to + 1))
+			elif to - frm == 2:
+				self.put(to + 1, self.remove(to - 1))
+
+		self.en_passant = en_passant
+		self.castling = castling
+		self.pos_kings[color] = pos_king
+		self.key = key
+		self.turn = color
+		self.fullmove -= not color
+
+	def repetitions(self):
+		""" Return how many times the position occurred before[1]_, with the same player to move, looking back
+		no further than the last capture or pawn move.
+
+		[1] https://www.chessprogramming.org/Repetitions
+		"""
+		count = 0
+		undo = self.undo
+		for i in range(4, min(self.halfmove, len(undo)) + 1, 2):
+			if undo[-i][7] == self.key:
+				count += 1
+		return count
 
-		piece = self.board[x][y]
-		self.board[x][y] = None
+	def promote(self, x, y, promotion):
+		""" Replace the piece at (x, y) by ``promotion``, keeping its color. """
+		color = self.remove(8*y + x) // 6
+		self.put(8*y + x, 6*color + PIECES.index(promotion))
 
-		assert piece is not None
-		
-		if piece[NAME] != 'K' and not self.check():
-			moves_legal = moves
-		else:
-			self.board[x][y] = piece
+	def pins_checks(self):
+		""" Return the squares that stop a check on the king and the lines pinned pieces are bound to[1]_.
 
-			# Verify moves that stop the check
-			for n, m in moves:
-				if piece[NAME] == 'K':
-					if piece[COLOR] == '0':
-						pos_kings = [(n, m), self.pos_kings[1]]				
-					else:
-						pos_kings = [self.pos_kings[0], (n, m)]
-				else:
-					pos_kings = list(self.pos_kings)
+		Outside check every square stops it, and in double check none does, so only the king may move.
 
-				game = Game(self.turn, [list(row) for row in self.board], pos_kings)				
-				game.make_move(x, y, n, m)
+		[1] https://www.chessprogramming.org/Pin
 
-				if not game.check():
-					moves_legal.add((n, m))
+		:rtype: (int, dict[int, int])
+		"""
+		color = self.turn
+		enemy = 0 if color else 1
+		x, y = self.pos_kings[color]
+		king = 8*y + x
+		bitboards = self.bitboards
+		base = 6*enemy
+		occupied = self.occupied[0] | self.occupied[1]
+
+		checkers = ATTACKS_PAWN[color][king] & bitboards[base + PAWN] | ATTACKS_KNIGHT[king] & bitboards[base + KNIGHT]
+		pins = {}
+
+		# Enemy sliders aiming at the king, looking through the king's own pieces
+		snipers = (attacks_bishop(king, self.occupied[enemy]) & (bitboards[base + BISHOP] | bitboards[base + QUEEN])
+				   | attacks_rook(king, self.occupied[enemy]) & (bitboards[base + ROOK] | bitboards[base + QUEEN]))
+		for sq in scan(snipers):
+			between = BETWEEN[king][sq] & occupied
+			if not between:
+				checkers |= 1 << sq
+			elif not between & (between - 1):
+				pins[between.bit_length() - 1] = BETWEEN[king][sq] | 1 << sq
+
+		if not checkers:
+			return FULL, pins
+		if checkers & (checkers - 1):
+			return 0, pins
+		return checkers | BETWEEN[king][checkers.bit_length() - 1], pins
+
+	def targets_legal(self, sq, restrictions):
+		""" Return the bitboard of allowed moves for the piece on ``sq``.
+
+		:param restrictions: the result of ``pins_checks`` for the current position.
+		:type restrictions: (int, dict[int, int])
+		"""
+		evasions, pins = restrictions
+		color, kind = divmod(self.squares[sq], 6)
+
+		if kind == KING:
+			# The king may not step into an attack, including along the line it is leaving
+			enemy = 0 if color else 1
+			occupied = (self.occupied[0] | self.occupied[1]) ^ 1 << sq
+			targets = 0
+			for to in scan(ATTACKS_KING[sq] & ~self.occupied[color]):
+				if not self.attacked(to, enemy, occupied):
+					targets |= 1 << to
+			if evasions == FULL:
+				targets |= self.moves_neutral(sq)
+			return targets
+
+		targets = self.moves_atk(sq)
+		if kind != PAWN:
+			return targets & evasions & pins.get(sq, FULL)
+
+		targets |= self.moves_neutral(sq)
+		if self.en_passant is None or not targets & 1 << self.en_passant:
+			return targets & evasions & pins.get(sq, FULL)
+
+		# An en passant capture removes two pieces from the same row, so it is verified on the board
+		en_passant = self.en_passant
+		targets = targets & evasions & pins.get(sq, FULL) & ~(1 << en_passant)
+		self.make_move(sq & 7, sq >> 3, en_passant & 7, en_passant >> 3)
+		x, y = self.pos_kings[color]
+		if not self.attacked(8*y + x, self.turn):
+			targets |= 1 << en_passant
+		self.unmake_move()
+		return targets
 
-		self.board[x][y] = piece
-		
-		return moves_legal
+	def get_moves_legal(self, x, y):
+		""" Return a list with allowed moves for one piece. """
+		targets = self.targets_legal(8*y + x, self.pins_checks())
+		return {(sq & 7, sq >> 3) for sq in scan(targets)}
 
 	def get_all_moves_legal(self):
 		""" Return a dictionary with allowed moves for each piece.
@@ -141,15 +563,71 @@ class Game:
 		:rtype: dict[(int, int), (int, int)]
 		"""
 		all_moves_legal = {}
+		restrictions = self.pins_checks()
 
-		for x in range(8):
-			for y in range(8):
-				other = self.board[x][y]
-				if other is not None and other[COLOR] == str(self.turn):
-					all_moves_legal[(x, y)] = self.get_moves_legal(x, y)
+		for sq in scan(self.occupied[self.turn]):
+			targets = self.targets_legal(sq, restrictions)
+			all_moves_legal[(sq & 7, sq >> 3)] = {(to & 7, to >> 3) for to in scan(targets)}
 
 		return all_moves_legal
 
+	def attacked(self, sq, color, occupied=None):
+		""" Check if the square ``sq`` is attacked by any piece of ``color``, with the board's occupancy or ``occupied``. """
+		bitboards = self.bitboards
+		base = 6*color
+
+		if ATTACKS_PAWN[not color][sq] & bitboards[base + PAWN]:
+			return True
+		if ATTACKS_KNIGHT[sq] & bitboards[base + KNIGHT]:
+			return True
+		if ATTACKS_KING[sq] & bitboards[base + KING]:
+			return True
+
+		if occupied is None:
+			occupied = self.occupied[0] | self.occupied[1]
+		sliders = bitboards[base + BISHOP] | bitboards[base + QUEEN]
+		if sliders and attacks_bishop(sq, occupied) & sliders:
+			return True
+		sliders = bitboards[base + ROOK] | bitboards[base + QUEEN]
+		if sliders and attacks_rook(sq, occupied) & sliders:
+			return True
+		return False
+
+	def attack_maps(self):
+		""" Return, for each color, the squares attacked from each square of its knights, bishops, rooks and
+		queens, and the union of every square its pieces attack[1]_. They are computed once per position.
+
+		[1] https://www.chessprogramming.org/Attack_and_Defend_Maps
+
+		:rtype: list[(dict[int, int], int)]
+		"""
+		if self.maps_key == self.key:
+			return self.maps
+
+		bitboards = self.bitboards
+		occupied = self.occupied[0] | self.occupied[1]
+		maps = []
+		for color in (0, 1):
+			base = 6*color
+			attacks = {}
+			for sq in scan(bitboards[base + KNIGHT]):
+				attacks[sq] = ATTACKS_KNIGHT[sq]
+			for sq in scan(bitboards[base + BISHOP]):
+				attacks[sq] = attacks_bishop(sq, occupied)
+			for sq in scan(bitboards[base + ROOK]):
+				attacks[sq] = attacks_rook(sq, occupied)
+			for sq in scan(bitboards[base + QUEEN]):
+				attacks[sq] = attacks_bishop(sq, occupied) | attacks_rook(sq, occupied)
+
+			x, y = self.pos_kings[color]
+			union = shift(bitboards[base + PAWN], STEPS_PAWN[color]) | ATTACKS_KING[8*y + x]
+			for targets in attacks.values():
+				union |= targets
+			maps.append((attacks, union))
+
+		self.maps, self.maps_key = maps, self.key
+		return maps
+
 	def under_attack(self, pos_pieces):
 		""" Check if any of the positions is being attacked.
 
@@ -157,107 +635,84 @@ class Game:
 		:type pos_pieces: set[(int, int)]
 		:rtype: bool
 		"""
-		for x in range(8):
-			for y in range(8):
-				other = self.board[x][y]
-				if other is not None and other[COLOR] != str(self.turn):		
-					if len(pos_pieces & self.get_moves_atk(x, y)) != 0:
-						return True
-		return False	
+		color = 0 if self.turn else 1
+		for x, y in pos_pieces:
+			if self.attacked(8*y + x, color):
+				return True
+		return False
 
 	def check(self):
-		""" Check if king is being attacked. """		
+		""" Check if king is being attacked. """
 		return self.under_attack({self.pos_kings[self.turn]})
 
-	def checkmate(self):
-		""" Return state[1]_ of the game.
-		
-		[1] {0: no checkmate, 1: checkmate, 2: stalemate}
+	def has_legal_move(self, restrictions=None):
+		""" Return True if the player currently playing has a legal move, stopping at the first one found.
+
+		King steps come first, being the only moves in double check; castling needs no test, as the king
+		may then step aside too. Pawns come last, since an en passant capture is verified on the board.
+
+		:param restrictions: the result of ``pins_checks``, if already known.
 		"""
-		if self.check():
-			checkmate = 1
-			for moves in self.get_all_moves_legal().values():
-				if len(moves) != 0:
-					checkmate = 0
-					break
-		else:
-			checkmate = 0
-		return checkmate
-			
+		if restrictions is None:
+			restrictions = self.pins_checks()
+		color = self.turn
+		enemy = 0 if color else 1
+		x, y = self.pos_kings[color]
+		king = 8*y + x
+
+		occupied = (self.occupied[0] | self.occupied[1]) ^ 1 << king
+		for to in scan(ATTACKS_KING[king] & ~self.occupied[color]):
+			if not self.attacked(to, enemy, occupied):
+				return True
+		if not restrictions[0]:
+			return False
+
+		pawns = self.bitboards[6*color + PAWN]
+		for sq in scan(self.occupied[color] & ~pawns & ~(1 << king)):
+			if self.targets_legal(sq, restrictions):
+				return True
+		for sq in scan(pawns):
+			if self.targets_legal(sq, restrictions):
+				return True
+		return False
+
+	def checkmate(self, restrictions=None):
+		""" Return the ``Status`` of the game.
+
+		:param restrictions: the result of ``pins_checks``, if already known.
+		"""
+		if restrictions is None:
+			restrictions = self.pins_checks()
+		if not self.has_legal_move(restrictions):
+			return Status.CHECKMATE if restrictions[0] != FULL else Status.STALEMATE
+		if self.halfmove >= 100:
+			return Status.FIFTY_MOVES
+		if self.repetitions() >= 2:
+			return Status.REPETITION
+		return Status.ONGOING
+
 	def evaluate(self):
 		""" Return an evaluation[1]_[2]_ for the piece's positions in ``board``.
-		
+
+		Material and piece-square values are kept up to date by ``put`` and ``remove``, so only the
+		kings, the pawn structure and the mobility[3]_ are left to compute here. Mobility counts the squares
+		attacked by knights, bishops, rooks and queens that their own side does not hold.
+
 		[1] https://www.chessprogramming.org/Evaluation
 		[2] https://www.chessprogramming.org/Simplified_Evaluation_Function
+		[3] https://www.chessprogramming.org/Mobility
 		"""
-		val = 0
-		no_pieces = 0
+		val = self.evaluate_static()
+		val += self.evaluate_structure() + self.evaluate_blocked(1) - self.evaluate_blocked(0)
 
-		for x in range(8):
-			for y in range(8):
-				if self.board[x][y] is None: continue
-				
-				no_pieces += 1
-				piece = self.board[x][y]
-
-				if int(piece[COLOR]):
-					i, j = y, x
-				else:
-					i, j = 7 - y, 7 - x
-			    
-				if piece[NAME] == 'P':
-					# Suppose right away it's an isolated, and then check if it actually is
-					centipawns = 50 + tables.EVAL_PAWN[i][j]
-
-					# Check if doubled
-					for m in range(8):
-						if m == y: continue
-						other = self.board[x][m]
-						if other is not None and other[COLOR] == piece[COLOR] and other[NAME] == 'P':
-							centipawns -= 50
-							break
-
-					# Check if not isolated
-					brk = False
-					for n in (y - 1, y + 1):
-						if not 0 <= n < 8: continue
-						for m in range(8):
-							other = self.board[n][m]
-							if other is not None and other[COLOR] == piece[COLOR] and other[NAME] == 'P':
-								centipawns += 50
-								brk = True
-								break
-						if brk: break
-						
-					# Check if blocked
-					if len( self.get_moves(x, y) ) == 0:
-						centipawns -= 50
-				if piece[NAME] == 'N':
-					centipawns = 320 + tables.EVAL_KNIGHT[i][j]
-				elif piece[NAME] == 'B':
-					centipawns = 330 + tables.EVAL_BISHOP[i][j]
-				elif piece[NAME] == 'R':
-					centipawns = 500 + tables.EVAL_ROOK[i][j]
-				elif piece[NAME] == 'Q':
-					centipawns = 900 + tables.EVAL_QUEEN[i][j]
-				elif piece[NAME] == 'K':
-					if no_pieces > 8:
-						centipawns = tables.EVAL_KING_MIDDLE[i][j]
-					else:
-						centipawns = tables.EVAL_KING_END[i][j]
-				else:
-					centipawns = 0
-
-				val += centipawns if piece[COLOR] == str(self.turn) else -centipawns
-
-		for moves_legal in self.get_all_moves_legal().values():
-			val += 10*len(moves_legal)
-
-		self.turn = 0 if self.turn else 1
-		for moves_legal in self.get_all_moves_legal().values():
-			val -= 10*len(moves_legal)
-
-		self.turn = 0 if self.turn else 1
+		maps = self.attack_maps()
+		for color, sign in ((1, 10), (0, -10)):
+			own = self.occupied[color]
+			for attacks in maps[color][0].values():
+				val += sign*popcount(attacks & ~own)
+
+		if not self.turn:
+			val = -val
 		'''
 		if abs(eval) > 1.5:
 			return (-1)**(eval < 0)*3
@@ -270,153 +725,136 @@ class Game:
 		'''
 		return val
 
-	def get_moves_atk(self, x, y):
-		""" Return attack moves. """
-		piece = self.board[x][y]
-		moves_atk = set()
+	def evaluate_static(self):
+		""" Return white's material and piece-square values minus black's, the kings' included, which depend on
+		nothing but where the pieces stand.
+		"""
+		(x0, y0), (x1, y1) = self.pos_kings
+		eval_kings = EVAL_KINGS[popcount(self.occupied[0] | self.occupied[1]) <= 8]
+		return self.score[1] - self.score[0] + eval_kings[1][8*y1 + x1] - eval_kings[0][8*y0 + x0]
+
+	def evaluate_structure(self):
+		""" Return white's pawn structure score minus black's, which depends on the pawns alone and so is kept
+		in the pawn hash table.
+		"""
+		key = self.key_pawns
+		entry = pawn_table[key & PAWN_TABLE_MASK]
+		if entry is not None and entry[0] == key:
+			return entry[1]
+
+		val = self.evaluate_pawns(1) - self.evaluate_pawns(0)
+		pawn_table[key & PAWN_TABLE_MASK] = (key, val)
+		return val
+
+	def evaluate_pawns(self, color):
+		""" Return the bonuses and penalties of the pawn structure of ``color``, doubled and isolated pawns. """
+		pawns = self.bitboards[6*color + PAWN]
+		val = 0
+
+		for x in range(8):
+			no_pawns = popcount(pawns & FILES[x])
+			if not no_pawns: continue
 
-		if piece[NAME] == 'P':
+			# Check if doubled
+			if no_pawns > 1:
+				val -= 50*no_pawns
+
+			# Check if not isolated
+			if pawns & FILES_ADJACENT[x]:
+				val += 50*no_pawns
+		return val
+
+	def evaluate_blocked(self, color):
+		""" Return the penalty of the blocked pawns of ``color``, which depend on the other pieces too. """
+		pawns = self.bitboards[6*color + PAWN]
+
+		# Check if blocked: neither the square ahead is empty nor a diagonal holds a capture
+		empty = FULL ^ (self.occupied[0] | self.occupied[1])
+		targets = self.occupied[not color]
+		if self.en_passant is not None:
+			targets |= 1 << self.en_passant & ROWS[2 if color else 5]
+
+		blocked = pawns & ~shift(empty, ((8 if color else -8, FULL),))
+		for s, mask in STEPS_PAWN[color]:
+			blocked &= ~(mask & shift(targets, ((-s, FULL),)))
+		return -50*popcount(blocked)
+
+	def moves_atk(self, sq):
+		""" Return the bitboard of attack moves of the piece on ``sq``. """
+		color, kind = divmod(self.squares[sq], 6)
+
+		if kind == PAWN:
 			# diagonal capture
-			b = (-1)**int(piece[COLOR])
-			for a in (-1, 1):
-				if 0 <= x + a < 8 and 0 <= y + b < 8:
-					other = self.board[x + a][y + b]
-					if other is not None and other[COLOR] != piece[COLOR]:
-						moves_atk.add((x + a, y + b))
-					elif other is None:
-						other = self.board[x + a][y + b - (-1)**int(piece[COLOR])]
-						if other is not None and other[NAME] == 'P' and other[EN_PASSANT] == '1':
-							moves_atk.add((x + a, y + b))
-		elif piece[NAME] == 'N':
+			targets = self.occupied[not color]
+			if self.en_passant is not None:
+				targets |= 1 << self.en_passant & ROWS[2 if color else 5]
+			return ATTACKS_PAWN[color][sq] & targets
+
+		occupied = self.occupied[0] | self.occupied[1]
+		if kind == KNIGHT:
 			# L-shape movement
-			for a in (-2, -1, 1, 2):
-				for b in (-2, -1, 1, 2):
-					if abs(a) == abs(b): continue
-					if 0 <= x + a < 8 and 0 <= y + b < 8:
-						other = self.board[x + a][y + b]
-						if other is None or other[COLOR] != piece[COLOR]:
-							moves_atk.add((x + a, y + b))
-		elif piece[NAME] == 'B':
+			moves = ATTACKS_KNIGHT[sq]
+		elif kind == BISHOP:
 			# diagonal movement
-			for a in (-1, 1):
-				for b in (-1, 1):			
-					k = 1
-					while 0 <= x + a*k < 8 and 0 <= y + b*k < 8:
-						other = self.board[x + a*k][y + b*k]
-						if other is None:
-							moves_atk.add((x + a*k, y + b*k))
-						elif other[COLOR] != piece[COLOR]:
-							moves_atk.add((x + a*k, y + b*k))
-							break
-						else:
-							break
-						k += 1
-		elif piece[NAME] == 'R':
+			moves = attacks_bishop(sq, occupied)
+		elif kind == ROOK:
 			# cross movement
-			for a in (-1, 0, 1):
-				for b in (-1, 0, 1):
-					if abs(a) == abs(b): continue
-					k = 1
-					while 0 <= x + a*k < 8 and 0 <= y + b*k < 8:
-						other = self.board[x + a*k][y + b*k]
-						if other is None:
-							moves_atk.add((x + a*k, y + b*k))
-						elif other[COLOR] != piece[COLOR]:
-							moves_atk.add((x + a*k, y + b*k))
-							break
-						else:
-							break
-						k += 1
-		elif piece[NAME] == 'Q':
+			moves = attacks_rook(sq, occupied)
+		elif kind == QUEEN:
 			# cross-diagonal movement
-			for a in (-1, 0, 1):
-				for b in (-1, 0, 1):
-					if a == b == 0: continue
-					k = 1
-					while 0 <= x + a*k < 8 and 0 <= y + b*k < 8:
-						other = self.board[x + a*k][y + b*k]
-						if other is None:
-							moves_atk.add((x + a*k, y + b*k))
-						elif other[COLOR] != piece[COLOR]:
-							moves_atk.add((x + a*k, y + b*k))
-							break
-						else:
-							break
-						k += 1
+			moves = attacks_slider(sq, occupied, STEPS_KING)
 		else:
 			# one-square cross-diagonal movement
-			for a in (-1, 0, 1):
-				for b in (-1, 0, 1):
-					if a == b == 0: continue
-					if 0 <= x + a < 8 and 0 <= y + b < 8:
-						other = self.board[x + a][y + b]
-						if other is None or other[COLOR] != piece[COLOR]:
-							moves_atk.add((x + a, y + b))
+			moves = ATTACKS_KING[sq]
+		return moves & ~self.occupied[color]
 
-		return moves_atk
+	def moves_neutral(self, sq):
+		""" Return the bitboard of neutral moves of the piece on ``sq``. """
+		color, kind = divmod(self.squares[sq], 6)
 
-	def get_moves_neutral(self, x, y):
-		""" Return neutral moves. """
-		piece = self.board[x][y]
-		moves_neutral = set()
+		occupied = self.occupied[0] | self.occupied[1]
 
-		if piece[NAME] == 'P':
+		if kind == PAWN:
 			# one-two-squares advance movement
-			for b in (1, 2):
-				b *= (-1)**int(piece[COLOR])
-				if 0 <= y + b < 8:
-					other = self.board[x][y + b]
-					if other is None:
-						moves_neutral.add((x, y + b))
-						if y != 1 + 5*int(piece[COLOR]): 
-							break
-					else:
-						break
-		else:
-			if piece[HAS_MOVED] == '1':
-				return moves_neutral
-
-			# castle
-			other = self.board[0][y]
-			if other is not None and other[NAME] == 'R' and other[HAS_MOVED] == '0':
-				# no piece between this rook and king
-				can_move = True
-				for i in range(3):
-					if self.board[1 + i][y] is not None:
-						can_move = False
-						break
-		
-				if can_move:
-					# enemy attack range doesn't reach squares between this rook and king
-					if not self.under_attack({(n, y) for n in range(1, x + 1)}):
-						moves_neutral.add((2, y))
-
-			other = self.board[7][y]
-			if other is not None and other[NAME] == 'R' and other[HAS_MOVED] == '0':
-				# no piece between this rook and king
-				can_move = True
-				for i in range(2):
-					if self.board[6 - i][y] is not None:
-						can_move = False
-						break
-
-				if can_move:
-					# enemy attack range doesn't reach squares between this rook and king
-					if not self.under_attack({(n, y) for n in range(x, 7)}):
-						moves_neutral.add((6, y))
-
-		return moves_neutral	
+			if color:
+				moves = 1 << sq >> 8 & ~occupied
+				return moves | (moves & ROWS[5]) >> 8 & ~occupied
+			moves = 1 << sq << 8 & ~occupied
+			return moves | (moves & ROWS[2]) << 8 & ~occupied
+
+		moves = 0
+		if kind != KING:
+			return moves
+
+		# castle
+		enemy = 0 if color else 1
+		if self.castling & 1 << 2*color:
+			# no piece between this rook and king
+			# enemy attack range doesn't reach squares the king crosses
+			if not occupied & 0xE << sq - 4 and not any(self.attacked(s, enemy) for s in (sq, sq - 1, sq - 2)):
+				moves |= 1 << sq - 2
+		if self.castling & 2 << 2*color:
+			if not occupied & 0x60 << sq - 4 and not any(self.attacked(s, enemy) for s in (sq, sq + 1, sq + 2)):
+				moves |= 1 << sq + 2
+		return moves
+
+	def get_moves_atk(self, x, y):
+		""" Return attack moves. """
+		return {(sq & 7, sq >> 3) for sq in scan(self.moves_atk(8*y + x))}
+
+	def get_moves_neutral(self, x, y):
+		""" Return neutral moves. """
+		return {(sq & 7, sq >> 3) for sq in scan(self.moves_neutral(8*y + x))}
 
 	def get_moves(self, x, y):
-		""" Return attack and neutral (if existing) moves considering the chess' movement rules [1]_. 
-		
+		""" Return attack and neutral (if existing) moves considering the chess' movement rules [1]_.
+
 		[1] this moves may not be allowed.
 		"""
-		piece = self.board[x][y]
-
-		if piece[NAME] in ('P', 'K'):
-			return self.get_moves_atk(x, y) | self.get_moves_neutral(x, y)
-		return self.get_moves_atk(x, y)	
+		sq = 8*y + x
+		if self.squares[sq] % 6 in (PAWN, KING):
+			return {(s & 7, s >> 3) for s in scan(self.moves_atk(sq) | self.moves_neutral(sq))}
+		return self.get_moves_atk(x, y)
 
 '''
 while True:
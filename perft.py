@@ -0,0 +1,135 @@
+""" Count the leaves of the legal move tree[1]_, to validate and time move generation.
+
+	python perft.py --depth 4
+	python perft.py --position kiwipete --depth 3 --divide
+	python perft.py --fen "8/8/8/8/8/8/8/K6k w - - 0 1" --depth 5
+	python perft.py --check 3
+
+[1] https://www.chessprogramming.org/Perft
+"""
+import game as gm
+# python libraries
+import argparse, sys, time
+
+# Reference positions[1]_ and their node counts from depth 1 onwards
+# [1] https://www.chessprogramming.org/Perft_Results
+POSITIONS = {
+	"initial": ("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+				(20, 400, 8902, 197281, 4865609, 119060324)),
+	"kiwipete": ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+				 (48, 2039, 97862, 4085603, 193690690)),
+	"position3": ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+				  (14, 191, 2812, 43238, 674624, 11030083)),
+	"position4": ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+				  (6, 264, 9467, 422333, 15833292)),
+	"position4-mirrored": ("r2q1rk1/pP1p2pp/Q4n2/bbp1p3/Np6/1B3NBn/pPPP1PPP/R3K2R b KQ - 0 1",
+						   (6, 264, 9467, 422333, 15833292)),
+	"position5": ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+				  (44, 1486, 62379, 2103487, 89941194)),
+	"position6": ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+				  (46, 2079, 89890, 3894594, 164075551)),
+}
+
+
+def moves(game):
+	""" Yield every legal move (x, y, n, m, promotion) of the player currently playing. """
+	restrictions = game.pins_checks()
+	row_last = 0 if game.turn else 7
+
+	for sq in gm.scan(game.occupied[game.turn]):
+		x, y = sq & 7, sq >> 3
+		pawn = game.squares[sq] % 6 == gm.PAWN
+
+		for to in gm.scan(game.targets_legal(sq, restrictions)):
+			n, m = to & 7, to >> 3
+			if pawn and m == row_last:
+				for promotion in "NBRQ":
+					yield x, y, n, m, promotion
+			else:
+				yield x, y, n, m, None
+
+def perft(game, depth):
+	""" Return the number of leaves ``depth`` plies below the position. """
+	if depth == 0:
+		return 1
+
+	# Count the moves at the last ply instead of making them
+	if depth == 1:
+		restrictions = game.pins_checks()
+		row_last = gm.ROWS[0 if game.turn else 7]
+		nodes = 0
+		for sq in gm.scan(game.occupied[game.turn]):
+			targets = game.targets_legal(sq, restrictions)
+			nodes += gm.popcount(targets)
+			if game.squares[sq] % 6 == gm.PAWN:
+				nodes += 3*gm.popcount(targets & row_last)
+		return nodes
+
+	nodes = 0
+	for x, y, n, m, promotion in moves(game):
+		game.make_move(x, y, n, m, promotion or 'Q')
+		nodes += perft(game, depth - 1)
+		game.unmake_move()
+	return nodes
+
+def divide(game, depth):
+	""" Return the number of leaves below each legal move, keyed by its coordinate notation, e.g. "e7e8q".
+
+	:rtype: dict[str, int]
+	"""
+	nodes = {}
+	for x, y, n, m, promotion in moves(game):
+		game.make_move(x, y, n, m, promotion or 'Q')
+		notation = gm.square_name(x, y) + gm.square_name(n, m) + (promotion or '').lower()
+		nodes[notation] = perft(game, depth - 1)
+		game.unmake_move()
+	return nodes
+
+def run(fen, depth, show_divide=False):
+	""" Print the node count of ``fen`` at ``depth`` along with the search speed, and return the count. """
+	game = gm.Game.from_fen(fen)
+
+	start_time = time.perf_counter()
+	if show_divide:
+		nodes_divide = divide(game, depth)
+		for notation, count in sorted(nodes_divide.items()):
+			print("{:s}: {:d}".format(notation, count))
+		nodes = sum(nodes_divide.values())
+	else:
+		nodes = perft(game, depth)
+	elapsed_time = time.perf_counter() - start_time
+
+	print("depth {:d}  nodes {:d}  time {:.2f}s  nps {:.0f}".format(depth, nodes, elapsed_time,
+		  nodes / elapsed_time if elapsed_time > 0 else 0))
+	return nodes
+
+def check(depth):
+	""" Compare every reference position against its known counts up to ``depth``; return True if all match. """
+	passed = True
+	for name, (fen, counts) in POSITIONS.items():
+		for d in range(1, min(depth, len(counts)) + 1):
+			print("{:s} ".format(name), end="")
+			nodes = run(fen, d)
+			if nodes != counts[d - 1]:
+				print("  FAILED: expected {:d}".format(counts[d - 1]))
+				passed = False
+	return passed
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Perft and divide for game.Game's move generation.")
+	parser.add_argument("--fen", help="position to count from")
+	parser.add_argument("--position", choices=sorted(POSITIONS), default="initial", help="reference position")
+	parser.add_argument("--depth", type=int, default=3)
+	parser.add_argument("--divide", action="store_true", help="show the count below each root move")
+	parser.add_argument("--check", type=int, metavar="DEPTH", help="verify every reference position up to DEPTH")
+	args = parser.parse_args()
+
+	if args.check is not None:
+		sys.exit(0 if check(args.check) else 1)
+
+	fen, counts = (args.fen, ()) if args.fen else POSITIONS[args.position]
+	nodes = run(fen, args.depth, args.divide)
+	if args.depth <= len(counts) and nodes != counts[args.depth - 1]:
+		print("FAILED: expected {:d}".format(counts[args.depth - 1]))
+		sys.exit(1)
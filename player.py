@@ -1,6 +1,8 @@
 import game as gm
+import engine as en
+import book as bk
 # python libraries
-import pygame, time, threading, copy, random
+import pygame, time, threading, copy, random, heapq, itertools
 
 class Player():
 	def __init__(self, name, color, timer, game, board):
@@ -29,7 +31,7 @@ class Human(Player):
 
 					self.board.update()
 
-					other = self.game.board[n][m]
+					other = self.game.get_piece(n, m)
 					if other is not None and other[gm.COLOR] == str(self.color):
 						if self.action(n, m, all_moves_legal):
 							self.timer.triggerStop()
@@ -65,7 +67,7 @@ class Human(Player):
 						
 					# Change selected piece
 					if (n, m) != (x, y):
-						other = self.game.board[n][m]
+						other = self.game.get_piece(n, m)
 						if other is not None and other[gm.COLOR] == str(self.game.turn):
 							return self.action(n, m, all_moves_legal)
 								
@@ -77,32 +79,53 @@ class Human(Player):
 
 
 class Computer(Player):
-	def __init__(self, name, color, timer, game, board, depth_final):
+	def __init__(self, name, color, timer, game, board, depth_final, table_size=16, workers=1, book=None,
+				 book_best=False, ponder=False):
 		super().__init__(name, color, timer, game, board)
-		self.depth_final = depth_final
+		self.engine = en.Engine(depth_final, table_size, workers)
+		self.book = None if book is None else bk.Book(book)
+		self.book_best = book_best
+		self.ponder = ponder
+		self.pondering = None
 
 	def play(self):
 		self.timer.triggerStop()
-		self.no_nodes = [0] * self.depth_final##
-		self.quiescence = False
-		self.table_killer = [{} for i in range(self.depth_final - 1)]
 
-		''' Tree visualization.
+		# The search pondered on the opponent's time is kept only if the opponent played the expected move
+		pondering, self.pondering = self.pondering, None
+		if pondering is not None and pondering.key != self.game.key:
+			pondering.cancel()
+			pondering = None
 
-		self.flag = False
-		'''
+		# Play from the opening book, while it knows the position
+		move = None if self.book is None else self.book.choose(self.game, self.book_best)
+		if move is not None:
+			if pondering is not None:
+				pondering.cancel()
+			x, y, n, m, promotion = move
+			self.move(x, y, n, m, promotion or 'Q')
+			return
 
-		game = gm.Game(self.game.turn, [list(row) for row in self.game.board], 
-					   list(self.game.pos_kings))
-		val, moves_best = self.negamax(game)#, depth=0, alpha=32767, beta=-32768)
+		time_soft, time_hard = self.timer.allocate()
+
+		# Take over the pondered search on a ponder hit
+		iteration = None if pondering is None else pondering.finish(time_soft, time_hard)
+
+		if iteration is not None:
+			_, val, moves_best = iteration
+		else:
+			info = lambda depth, val, moves_best, elapsed_time: print("depth", depth, "val", val, "time", round(elapsed_time, 2))##
+			val, moves_best = self.engine.search(self.game, time_soft, time_hard, info)
+
+			print(self.engine.no_nodes, self.engine.no_nodes_quiescence, self.engine.no_hits)
+			if self.engine.time_workers:
+				print("workers", self.engine.workers, "utilisation", round(self.engine.time_workers / self.engine.time, 2))
 
 		assert len(moves_best) > 0
 
 		''' Best variation visualization. '''
-		print(self.no_nodes)
-		print(self.table_killer)
 		print(val, moves_best)
-		f = game.turn
+		f = self.game.turn
 		for m in reversed(moves_best):
 			if not f: 
 				print("...", end="")
@@ -114,172 +137,89 @@ class Computer(Player):
 		try:
 			print(moves_best)
 			x, y, n, m, _ = moves_best[-1]
+			promotion = 'Q'
 		except ValueError:
 			x, y, n, m, promotion, _ = moves_best[-1]
-			
+
+		self.move(x, y, n, m, promotion)
+
+		# Search the position after the expected reply while the opponent thinks
+		if self.ponder and len(moves_best) > 1:
+			game = self.game.copy()
+			reply = moves_best[-2]
+			game.make_move(*reply[:4], reply[4] if len(reply) == 6 else 'Q')
+			self.pondering = en.Ponder(game, self.engine.depth_max, self.engine.table_size)
+
+	def move(self, x, y, n, m, promotion):
+		""" Make a move on the board, with its sound, and stop the clock. """
 		self.board.origin = (x, y)
 		self.board.destin = (n, m)
 		
-		captured, promoted = self.game.make_move(x, y, n, m)
+		captured, promoted = self.game.make_move(x, y, n, m, promotion)
 
 		if captured:
 			self.board.sound_capture.play()
 		else:
 			self.board.sound_move.play()
-		if promoted:
-			self.game.board[n][m] = promotion + str(self.game.turn)
 
 		self.board.update()
 		self.timer.triggerStop()
 		return 
 
 
-	def try_move(self, x, y, n, m, other, val_best, moves_best, game, depth, alpha, beta):
-		# self.quiescence = False
-		game2 = gm.Game(game.turn, [list(row) for row in game.board], 
-					    list(game.pos_kings))
-		captured, promoted = game2.make_move(x, y, n, m)
-		game2.turn = 0 if game2.turn else 1
-
-		# if not captured and depth == 2:
-			# self.quiescence = True
-
-		'''	Tree visualization.
-
-		notation = other[gm.NAME]
-		if captured:
-			if notation == 'P':
-				notation = chr(97 + x)
-			notation += 'x'
-		if notation == 'P':
-			notation = ''
-		print("{:s}{:4s}  ".format(' '*6*depth if self.flag else '', notation + chr(97 + n) + str(8 - m)), end='')
-		self.flag = False
-		'''
-
-		if promoted:
-			for promotion in ('N', 'B', 'R', 'Q'):
-				game2.board[n][m] = promotion + str(self.game.turn)
-
-				# recursiveness
-				val, moves = self.negamax(game2, depth + 1, -beta, -alpha)
-				val = -val
-
-				''' Tree visualization.
-
-				print(" {:d}".format(val))
-				self.flag = True
-				'''
-
-				if val_best < val:
-					notation = other[gm.NAME]
-					if captured:
-						if notation == 'P':
-							notation = chr(97 + x)
-						notation += 'x'
-					if notation == 'P':
-						notation = ''
-					val_best = val
-					moves.append((x, y, n, m, promotion, notation))
-					moves_best = moves
-				alpha = max(alpha, val)
-				
-		else:
-			# recursiveness
-			val, moves = self.negamax(game2, depth + 1, -beta, -alpha)
-			val = -val
-
-			''' Tree visualization.
+## Bugs: increment is added even after game is over
 
-			print(" {:d}".format(val))
-			self.flag = True
-			'''
-			
-			if val_best < val:
-				notation = other[gm.NAME]
-				if captured:
-					if notation == 'P':
-						notation = chr(97 + x)
-					notation += 'x'
-				if notation == 'P':
-					notation = ''
-				val_best = val
-				moves.append((x, y, n, m, notation))
-				moves_best = moves
-			alpha = max(alpha, val)
-
-		return val_best, moves_best, alpha, beta
-
-	def negamax(self, game, depth=0, alpha=-32768, beta=32767):
-		""" Find best move recursively using the negamax algorithm along side with modest optimizations. """
-		checkmate = game.checkmate()
-		if checkmate == 1:
-			self.no_nodes[depth - 1] += 1
-			return game.evaluate() - 20000, []
-		if checkmate == 2:
-			self.no_nodes[depth - 1] += 1
-			return 0, []
-		# quiescence search
-		# if self.quiescence:
-			# self.no_nodes[depth - 1] += 1
-			# return game.evaluate(), []
-		if depth == self.depth_final:
-			self.no_nodes[depth - 1] += 1
-			return game.evaluate(), []
-
-		val_best, moves_best = -32768, []
-		all_moves_killer = self.table_killer[depth - 1]
-
-		# Calculate killer moves
-		if depth != 0:
-			moves_killer = sorted(all_moves_killer.keys(), key=lambda x: all_moves_killer[x], reverse=True)[0:2]
-			for move_killer in moves_killer:
-				x, y, n, m = move_killer
-				other = game.board[x][y]
-				if other is None or other[gm.COLOR] != str(game.turn): continue
-
-				moves_legal = game.get_moves_legal(x, y)
-
-				if (n, m) in moves_legal:
-					val_best, moves_best, alpha, beta = self.try_move(x, y, n, m, other, val_best, moves_best, 
-																	  game, depth, alpha, beta)	
-					# alpha-beta prune
-					if alpha >= beta:
-						all_moves_killer[move_killer] += 1
-						return val_best, moves_best
+class Scheduler:
+	""" A single thread that runs the timed events of every clock, sleeping until the earliest one is due. """
+	def __init__(self):
+		self.events = []	# heap of [due time in ns, order, callback]; a cancelled event's callback is None
+		self.order = itertools.count()
+		self.condition = threading.Condition()
+		self.thread = None
+
+	def schedule(self, due_ns, callback):
+		""" Run ``callback`` once ``time.monotonic_ns()`` reaches ``due_ns``, and return the event. """
+		event = [due_ns, next(self.order), callback]
+		with self.condition:
+			heapq.heappush(self.events, event)
+			if self.thread is None:
+				self.thread = threading.Thread(target=self.run, daemon=True)
+				self.thread.start()
+			self.condition.notify()
+		return event
+
+	def cancel(self, event):
+		with self.condition:
+			event[2] = None
+
+	def run(self):
+		while True:
+			with self.condition:
+				while not self.events or self.events[0][2] is None or self.events[0][0] > time.monotonic_ns():
+					if self.events and self.events[0][2] is None:
+						heapq.heappop(self.events)
+					elif self.events:
+						self.condition.wait((self.events[0][0] - time.monotonic_ns()) / 1e9)
 					else:
-						if all_moves_killer[move_killer] == 0:
-							del all_moves_killer[move_killer]
-						else:
-							all_moves_killer[move_killer] -= 1
-
-		# Calculate all moves
-		for x in range(8):
-			for y in range(8):
-				other = game.board[x][y]
-				if other is None or other[gm.COLOR] != str(game.turn): continue
-
-				moves_legal = game.get_moves_legal(x, y)
-				
-				for n, m in moves_legal:
-					val_best, moves_best, alpha, beta = self.try_move(x, y, n, m, other, val_best, moves_best, 
-																	  game, depth, alpha, beta)	
-					# alpha-beta prune
-					if alpha >= beta:
-						if (x, y, n, m) in all_moves_killer:
-							all_moves_killer[(x, y, n, m)] += 1
-						else:
-							all_moves_killer[(x, y, n, m)] = 1
-						return val_best, moves_best
-
-		return val_best, moves_best
+						self.condition.wait()
+				callback = heapq.heappop(self.events)[2]
+			callback()
 
+SCHEDULER = Scheduler()
 
-## Bugs: increment is added even after game is over
 
 class Timer:
+	""" A chess clock that keeps the time left at its last start or stop, from ``time.monotonic_ns()``, and works
+	out the current one on demand. The low time warning and the flag fall are events of the shared scheduler.
+	"""
+	RATE_STOPPED = 0	# how fast the time left grows while the clock is stopped
+
 	def __init__(self, seconds):
-		self.seconds = seconds
+		self.remaining_ns = round(seconds * 1e9)	# time left at ``since_ns``
+		self.since_ns = None	# when the clock was last started or stopped, None until ``ready``
+		self.running = False
+		self.flagged = False
+		self.events = []
 	
 		self.__WARNING_LIMIT = 30	# must be less or equal to.warning_sound's time
 
@@ -289,28 +229,62 @@ class Timer:
 	def __repr__(self):
 		s = int(self.seconds)
 		return "{:02d}:{:02d}".format(s//60, s%60) if s < 3600 else "{:02d}:{:02d}:{:02d}".format(s//3600, s%3600//60, s%60)
+
+	@property
+	def seconds(self):
+		return self.remaining(time.monotonic_ns()) / 1e9
+
+	@seconds.setter
+	def seconds(self, seconds):
+		now = time.monotonic_ns()
+		self.settle(now)
+		self.remaining_ns = round(seconds * 1e9)
+		self.schedule(now)
+
+	def remaining(self, now):
+		""" Return the time left, in ns, at ``now``. """
+		if self.since_ns is None or self.flagged:
+			return self.remaining_ns
+		if self.running:
+			return max(0, self.remaining_ns - (now - self.since_ns))
+		return self.remaining_ns + self.RATE_STOPPED * (now - self.since_ns)
+
+	def settle(self, now):
+		self.remaining_ns = self.remaining(now)
+		self.since_ns = now
 	
+	def allocate(self, moves_to_go=30):
+		""" Return the soft and hard time budgets, in seconds, for the next move. """
+		return en.allocate(self.seconds, getattr(self, "increment", 0), moves_to_go)
+
 	def ready(self):
-		self.end_thread = False
-		self.stop_thread = True	
-		threading.Thread(target=self.countDown, daemon=True).start()
-
-	def countDown(self):
-		while not self.end_thread:
-			flag = True
-			while not self.stop_thread:
-				init_time = time.time()
-				#print(self)##
-				time.sleep(0.01)
-				if self.seconds <= self.__WARNING_LIMIT and flag:
-					self.warning_sound.play()
-					flag = False
-				if self.seconds <= 0:
-					self.warning_sound.stop()
-					self.end_thread = True
-					break
-				self.seconds -= time.time() - init_time
-			time.sleep(0.01)
+		self.since_ns = time.monotonic_ns()
+		self.running = False
+		self.flagged = False
+
+	def toggle(self, stop=None):
+		""" Stop or start the clock, toggling it by default, and return True if it is stopped. """
+		now = time.monotonic_ns()
+		self.settle(now)
+		self.running = not self.running if stop is None else not stop
+		self.schedule(now)
+		return not self.running
+
+	def schedule(self, now):
+		""" Plan the low time warning and the flag fall of a running clock, instead of those planned before. """
+		for event in self.events:
+			SCHEDULER.cancel(event)
+		self.events = []
+		if self.running and not self.flagged:
+			warning_ns = self.remaining_ns - self.__WARNING_LIMIT * 10**9
+			self.events.append(SCHEDULER.schedule(now + max(0, warning_ns), self.warning_sound.play))
+			self.events.append(SCHEDULER.schedule(now + self.remaining_ns, self.flag))
+
+	def flag(self):
+		""" End the clock once its time is over. """
+		self.settle(time.monotonic_ns())
+		self.flagged = True
+		self.warning_sound.stop()
 	
 	
 
@@ -320,10 +294,8 @@ class Fischer(Timer):
 		super().__init__(seconds)
 		self.increment = increment
 
-	def triggerStop(self, stop_thread=None):
-		self.stop_thread = not self.stop_thread if stop_thread == None else stop_thread
-				
-		if self.stop_thread:
+	def triggerStop(self, stop=None):
+		if self.toggle(stop):
 			self.seconds += self.increment
 			print(self)##
 			self.warning_sound.stop()
@@ -337,10 +309,8 @@ class Bronstein(Timer):
 		self.increment = increment
 		self.init_seconds = self.seconds
 		
-	def triggerStop(self, stop_thread = None):
-		self.stop_thread = not self.stop_thread if stop_thread == None else stop_thread
-
-		if self.stop_thread:
+	def triggerStop(self, stop=None):
+		if self.toggle(stop):
 			self.seconds += self.increment if self.increment < self.init_seconds - self.seconds else self.init_seconds - self.seconds
 			print(self)##
 			self.warning_sound.stop()
@@ -354,45 +324,25 @@ class Delay(Timer):
 		super().__init__(seconds)
 		self.increment = increment
 
-	def triggerStop(self, stop_thread = None):
-		self.stop_thread = not self.stop_thread if stop_thread == None else stop_thread
-		
-		if self.stop_thread:
+	def triggerStop(self, stop=None):
+		if self.toggle(stop):
 			self.warning_sound.stop()
 		else:
 			self.seconds += self.increment
 			print(self)##
+
+	def allocate(self, moves_to_go=30):
+		# The increment is already part of ``seconds`` once the clock runs
+		time_soft, time_hard = super().allocate(moves_to_go)
+		return max(0, time_soft - 0.75*self.increment), max(0, time_hard - self.increment)
 		
 
 # No increment
 # While time is decreasing for one player,
 # it's increasing for the other
 class HourGlass(Timer):
-	def __init__(self, seconds):
-		super().__init__(seconds)
+	RATE_STOPPED = 1
 
-	def triggerStop(self, stop_thread = None):          
-		self.stop_thread = not self.stop_thread if stop_thread == None else stop_thread 
+	def triggerStop(self, stop=None):
+		self.toggle(stop)
 		self.warning_sound.stop()
-
-	def countDown(self):
-		while not self.end_thread:
-			flag = True
-			while not self.stop_thread:
-				init_time = time.time()
-				#print(self)##
-				time.sleep(0.01)
-				if self.seconds <= self.__WARNING_LIMIT and flag:
-					self.warning_sound.play()
-					flag = False
-				if self.seconds <= 0:
-					self.warning_sound.stop()
-					self.end_thread = True
-					break
-				self.seconds -= time.time() - init_time 
-			while self.stop_thread:
-				init_time = time.time()
-				#print(self)##
-				time.sleep(0.01)
-				self.seconds += time.time() - init_time
-
@@ -1,3 +1,6 @@
+# Material value of each kind of piece: pawn, knight, bishop, rook, queen and king
+VALUES = (50, 320, 330, 500, 900, 0)
+
 EVAL_PAWN = [
 	[ 0,  0,  0,  0,  0,  0,  0,  0],
 	[50, 50, 50, 50, 50, 50, 50, 50],
@@ -0,0 +1,152 @@
+""" Play engine against engine without a window, on every core, to measure the strength of a change.
+
+	python tournament.py --first depth=4 --second depth=3 --games 100
+	python tournament.py --first clock=60+1 --second movetime=0.5 --openings openings.epd --output results.jsonl
+
+Each opening is played twice, the engines swapping colors. Every game is written to the results file as a
+line of JSON as soon as it finishes, and the totals are printed from the first engine's point of view.
+"""
+import game as gm
+import engine as en
+# python libraries
+import argparse, concurrent.futures, json, math, os, time
+
+OPENINGS = (
+	"rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+	"rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+	"rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+	"rnbqkbnr/pppp1ppp/4p3/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2",
+	"rnbqkbnr/ppp1pppp/8/3p4/3P4/8/PPP1PPPP/RNBQKBNR w KQkq - 0 2",
+	"rnbqkb1r/pppppppp/5n2/8/3P4/8/PPP1PPPP/RNBQKBNR w KQkq - 1 2",
+	"rnbqkbnr/pppppppp/8/8/2P5/8/PP1PPPPP/RNBQKBNR b KQkq - 0 1",
+	"rnbqkbnr/pppppppp/8/8/8/5N2/PPPPPPPP/RNBQKB1R b KQkq - 1 1",
+)
+
+def parse_spec(spec):
+	""" Return the settings of an engine written as e.g. "depth=4,hash=16", "movetime=0.5" or "clock=60+1".
+
+	:rtype: dict
+	"""
+	settings = {"depth": 32, "hash": 16}
+	for item in spec.split(','):
+		name, value = item.split('=')
+		if name == "clock":
+			seconds, _, increment = value.partition('+')
+			settings[name] = (float(seconds), float(increment or 0))
+		elif name == "movetime":
+			settings[name] = float(value)
+		else:
+			settings[name] = int(value)
+	return settings
+
+def play_game(index, fen, white, black, max_plies):
+	""" Play one game from ``fen`` between the engines set by ``white`` and ``black``, in a worker process, and
+	return its record.
+	"""
+	game = gm.Game.from_fen(fen)
+	settings = {1: white, 0: black}
+	engines = {color: en.Engine(settings[color]["depth"], settings[color]["hash"]) for color in (0, 1)}
+	clocks = {color: settings[color].get("clock", (None, 0))[0] for color in (0, 1)}
+	moves = []
+
+	result, reason = "1/2-1/2", "max plies"
+	for ply in range(max_plies):
+		turn = game.turn
+		status = game.checkmate()
+		if status == gm.Status.CHECKMATE:
+			result, reason = "0-1" if turn else "1-0", "checkmate"
+			break
+		if status != gm.Status.ONGOING:
+			result, reason = "1/2-1/2", status.name.lower().replace('_', ' ')
+			break
+
+		if "movetime" in settings[turn]:
+			time_soft = time_hard = settings[turn]["movetime"]
+		elif clocks[turn] is not None:
+			time_soft, time_hard = en.allocate(clocks[turn], settings[turn]["clock"][1])
+		else:
+			time_soft = time_hard = float("inf")
+
+		start_time = time.perf_counter()
+		val, moves_best = engines[turn].search(game, time_soft, time_hard)
+		if clocks[turn] is not None:
+			clocks[turn] -= time.perf_counter() - start_time
+			if clocks[turn] < 0:
+				result, reason = "0-1" if turn else "1-0", "time"
+				break
+			clocks[turn] += settings[turn]["clock"][1]
+
+		move = moves_best[-1]
+		game.make_move(*move[:4], move[4] if len(move) == 6 else 'Q')
+		moves.append(en.move_name(move))
+
+	return {"game": index, "opening": fen, "white": white["name"], "black": black["name"], "result": result,
+			"reason": reason, "plies": len(moves), "moves": " ".join(moves)}
+
+def elo(score):
+	""" Return the Elo difference[1]_ that makes ``score``, a fraction of the points, the expected one.
+
+	[1] https://www.chessprogramming.org/Match_Statistics
+	"""
+	score = min(max(score, 1e-6), 1 - 1e-6)
+	return -400 * math.log10(1 / score - 1)
+
+def totals(wins, draws, losses):
+	""" Return a summary of the results, with the Elo difference and its 95% confidence margin. """
+	games = wins + draws + losses
+	score = (wins + draws / 2) / games
+	deviation = math.sqrt((wins*(1 - score)**2 + draws*(0.5 - score)**2 + losses*score**2) / games / games)
+	margin = (elo(score + 1.96*deviation) - elo(score - 1.96*deviation)) / 2
+	return "games {:d}  +{:d} ={:d} -{:d}  score {:.1f}%  elo {:+.0f} +/- {:.0f}".format(games, wins, draws,
+		   losses, 100*score, elo(score), margin)
+
+def run(first, second, openings, games, max_plies, workers, output):
+	""" Play ``games`` games, streaming their records to ``output``, and return the first engine's
+	(wins, draws, losses).
+	"""
+	jobs = []
+	for index in range(games):
+		fen = openings[index // 2 % len(openings)]
+		white, black = (first, second) if index % 2 == 0 else (second, first)
+		jobs.append((index, fen, white, black, max_plies))
+
+	wins = draws = losses = 0
+	with concurrent.futures.ProcessPoolExecutor(workers) as pool, open(output, 'a') as results:
+		futures = [pool.submit(play_game, *job) for job in jobs]
+		for future in concurrent.futures.as_completed(futures):
+			record = future.result()
+			results.write(json.dumps(record, separators=(',', ':')) + '\n')
+			results.flush()
+
+			if record["result"] == "1/2-1/2":
+				draws += 1
+			elif (record["result"] == "1-0") == (record["white"] == first["name"]):
+				wins += 1
+			else:
+				losses += 1
+			print(totals(wins, draws, losses), end='\r')
+	print()
+	return wins, draws, losses
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Self-play tournament between two engine settings.")
+	parser.add_argument("--first", default="depth=3", help="settings of the first engine, e.g. depth=4,hash=16")
+	parser.add_argument("--second", default="depth=3", help="settings of the second engine, e.g. clock=60+1")
+	parser.add_argument("--games", type=int, default=2*len(OPENINGS))
+	parser.add_argument("--openings", help="file with a FEN or EPD position on each line")
+	parser.add_argument("--max-plies", type=int, default=1000, help="plies after which a game is adjudicated a draw")
+	parser.add_argument("--workers", type=int, default=os.cpu_count())
+	parser.add_argument("--output", default="results.jsonl")
+	args = parser.parse_args()
+
+	first, second = parse_spec(args.first), parse_spec(args.second)
+	first["name"], second["name"] = "first " + args.first, "second " + args.second
+
+	openings = OPENINGS
+	if args.openings:
+		with open(args.openings) as f:
+			# EPD lines lack the move counters and may carry operations after them
+			openings = [" ".join(line.split()[:4]) + " 0 1" for line in f if line.strip()]
+
+	run(first, second, openings, args.games, args.max_plies, args.workers, args.output)
@@ -0,0 +1,49 @@
+# Bound types of a stored score
+EXACT = 0; LOWER = 1; UPPER = 2
+
+# Approximate size of one entry in bytes: the slot, its tuple, the key and the score
+ENTRY_SIZE = 240
+
+class TranspositionTable:
+	""" A fixed-size table of searched positions[1]_, indexed by their zobrist key.
+
+	Each entry is a tuple (key, depth, bound, score, move, generation). A slot is overwritten when
+	it is empty, when its entry was stored by an earlier search, or when the new entry was searched
+	at least as deep.
+
+	[1] https://www.chessprogramming.org/Transposition_Table
+
+	:param size: the memory budget in MB.
+	:type size: int | float
+	"""
+	def __init__(self, size=16):
+		# Round the number of slots down to a power of two, so the key can be masked into an index
+		slots = max(1, int(size * 2**20) // ENTRY_SIZE)
+		self.mask = (1 << slots.bit_length() - 1) - 1
+		self.entries = [None] * (self.mask + 1)
+		self.generation = 0
+
+	def __len__(self):
+		return len(self.entries)
+
+	def clear(self):
+		""" Drop every entry. """
+		self.entries = [None] * (self.mask + 1)
+
+	def new_search(self):
+		""" Age the stored entries, so they are the first to be replaced. """
+		self.generation += 1
+
+	def probe(self, key):
+		""" Return the entry stored for ``key``, or None. """
+		entry = self.entries[key & self.mask]
+		if entry is not None and entry[0] == key:
+			return entry
+		return None
+
+	def store(self, key, depth, bound, score, move):
+		""" Store a searched position according to the replacement policy. """
+		index = key & self.mask
+		entry = self.entries[index]
+		if entry is None or entry[5] != self.generation or depth >= entry[1]:
+			self.entries[index] = (key, depth, bound, score, move, self.generation)
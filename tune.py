@@ -0,0 +1,159 @@
+""" Tune the piece values and piece-square tables on labelled positions, by Texel's method[1]_.
+
+	python tune.py --epd quiet-labeled.epd --epochs 20 --output tables_tuned.py
+
+Each EPD line holds a position and the result of the game it was taken from, as ``c9 "1-0";``, ``[0.5]`` or
+the bare result. The material and piece-square score of a position, mapped through a sigmoid, predicts that
+result; the mean squared error is minimised by gradient descent with Adam[2]_, a chunk of lines at a time,
+so the file is streamed from disk on every epoch and may be larger than memory. The other terms of
+``game.Game.evaluate`` are left out. The tables are written as a module to take the place of ``tables.py``.
+Needs NumPy, which the game does not.
+
+[1] https://www.chessprogramming.org/Texel%27s_Tuning_Method
+[2] https://arxiv.org/abs/1412.6980
+"""
+import game as gm
+import tables
+# python libraries
+import argparse, itertools, re, time
+import numpy as np
+
+NAMES = ("EVAL_PAWN", "EVAL_KNIGHT", "EVAL_BISHOP", "EVAL_ROOK", "EVAL_QUEEN", "EVAL_KING_MIDDLE", "EVAL_KING_END")
+
+# Parameters: the values of pawn to queen, then each table's 64 squares seen from white's side
+TABLE = 5
+PARAMETERS = TABLE + 64*len(NAMES)
+
+RESULT = re.compile(r'"?(1-0|0-1|1/2-1/2)"?|\[(1\.0|0\.5|0\.0|1|0)\]')
+RESULTS = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}
+
+def initial():
+	""" Return the parameters of ``tables`` as a float array. """
+	params = np.zeros(PARAMETERS)
+	params[:TABLE] = tables.VALUES[:TABLE]
+	for i, name in enumerate(NAMES):
+		params[TABLE + 64*i:TABLE + 64*(i + 1)] = np.ravel(getattr(tables, name))
+	return params
+
+def parse(line):
+	""" Return the 64 pieces of an EPD line, -1 for the empty squares, and the result for white, or None if the
+	line has no result.
+	"""
+	match = RESULT.search(line, line.find(' '))
+	if match is None:
+		return None
+	result = RESULTS[match.group(1)] if match.group(1) else float(match.group(2))
+
+	squares = []
+	for char in line.split(None, 1)[0]:
+		if char.isdigit():
+			squares += [-1]*int(char)
+		elif char != '/':
+			squares.append(6*char.isupper() + gm.PIECES.index(char.upper()))
+	return squares, result
+
+def chunks(path, size):
+	""" Yield the positions of ``path`` as (N, 64) int8 pieces and (N,) results, ``size`` lines at a time. """
+	with open(path) as f:
+		while True:
+			lines = list(itertools.islice(f, size))
+			if not lines:
+				return
+			parsed = [entry for entry in map(parse, lines) if entry is not None]
+			if parsed:
+				squares, results = zip(*parsed)
+				yield np.array(squares, dtype=np.int8), np.array(results)
+
+def features(squares):
+	""" Return (rows, indices, signs): every piece counts ``sign`` times the parameters at ``indices`` in the
+	score of row ``rows``, its value and its square's entry.
+	"""
+	rows, sqs = np.nonzero(squares >= 0)
+	color, kind = np.divmod(squares[rows, sqs].astype(np.intp), 6)
+	signs = np.where(color == 1, 1.0, -1.0)
+
+	# Black's squares are turned around; kings use their end game table once 8 pieces or fewer are left
+	end = np.count_nonzero(squares >= 0, axis=1) <= 8
+	table = np.where(kind == gm.KING, 5 + end[rows], kind)
+	squares_table = TABLE + 64*table + np.where(color == 1, sqs, 63 - sqs)
+
+	has_value = kind != gm.KING
+	return (np.concatenate((rows, rows[has_value])), np.concatenate((squares_table, kind[has_value])),
+			np.concatenate((signs, signs[has_value])))
+
+def scores(params, rows, indices, signs, count):
+	""" Return the score from white's side of each of ``count`` positions. """
+	return np.bincount(rows, signs*params[indices], count)
+
+def sigmoid(val, k):
+	return 1 / (1 + 10**(-k*val / 400))
+
+def fit_k(path, params, size):
+	""" Return the scaling constant of the sigmoid that best predicts the results of the first chunk. """
+	squares, results = next(chunks(path, size))
+	val = scores(params, *features(squares), len(squares))
+	low, high = 0.0, 10.0
+	for _ in range(50):
+		k1, k2 = low + (high - low) / 3, high - (high - low) / 3
+		if np.mean((results - sigmoid(val, k1))**2) < np.mean((results - sigmoid(val, k2))**2):
+			high = k2
+		else:
+			low = k1
+	return (low + high) / 2
+
+def tune(path, params, k, epochs, size=100000, rate=1.0):
+	""" Minimise the prediction error over ``path`` for ``epochs`` passes, a step per chunk of ``size`` lines,
+	and return the parameters.
+	"""
+	moment, velocity, steps = np.zeros(PARAMETERS), np.zeros(PARAMETERS), 0
+	for epoch in range(epochs):
+		start_time = time.perf_counter()
+		error, positions = 0.0, 0
+		for squares, results in chunks(path, size):
+			rows, indices, signs = features(squares)
+			predicted = sigmoid(scores(params, rows, indices, signs, len(squares)), k)
+			error += np.sum((results - predicted)**2)
+			positions += len(squares)
+
+			# d/dval of the mean squared error, spread back onto the parameters each row uses
+			gradient_rows = 2*(predicted - results)*predicted*(1 - predicted)*k*np.log(10) / 400 / len(squares)
+			gradient = np.bincount(indices, signs*gradient_rows[rows], PARAMETERS)
+
+			steps += 1
+			moment = 0.9*moment + 0.1*gradient
+			velocity = 0.999*velocity + 0.001*gradient**2
+			params = params - rate*(moment / (1 - 0.9**steps)) / (np.sqrt(velocity / (1 - 0.999**steps)) + 1e-8)
+
+		print("epoch {:d}  positions {:d}  error {:.6f}  time {:.1f}s".format(epoch + 1, positions,
+			  error / max(positions, 1), time.perf_counter() - start_time))
+	return params
+
+def write(params, output):
+	""" Write the parameters, rounded, as a tables module. """
+	params = np.rint(params).astype(int)
+	values = list(params[:TABLE]) + [0]
+	lines = ["# Material value of each kind of piece: pawn, knight, bishop, rook, queen and king",
+			 "VALUES = ({:s})".format(", ".join(map(str, values))), ""]
+	for i, name in enumerate(NAMES):
+		table = params[TABLE + 64*i:TABLE + 64*(i + 1)].reshape(8, 8)
+		width = max(len(str(entry)) for entry in table.flat)
+		rows = ["\t[" + ",".join(str(entry).rjust(width) for entry in row) + "]" for row in table]
+		lines += [name + " = [", ",\n".join(rows), "]"]
+	with open(output, 'w') as f:
+		f.write("\n".join(lines) + "\n")
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Tune the evaluation tables on positions labelled with results.")
+	parser.add_argument("--epd", required=True, help="file of positions, each with its game's result")
+	parser.add_argument("--epochs", type=int, default=10)
+	parser.add_argument("--chunk", type=int, default=100000, help="lines read and stepped on at a time")
+	parser.add_argument("--rate", type=float, default=1.0, help="step size, in centipawns")
+	parser.add_argument("--k", type=float, help="scaling of the sigmoid, fitted on the first chunk if left out")
+	parser.add_argument("--output", default="tables_tuned.py")
+	args = parser.parse_args()
+
+	params = initial()
+	k = args.k if args.k is not None else fit_k(args.epd, params, args.chunk)
+	print("k {:.4f}".format(k))
+	write(tune(args.epd, params, k, args.epochs, args.chunk, args.rate), args.output)
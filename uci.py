@@ -0,0 +1,148 @@
+""" Play through the Universal Chess Interface[1]_ over stdin and stdout, without a window.
+
+	python uci.py
+
+[1] https://www.chessprogramming.org/UCI
+"""
+import game as gm
+import engine as en
+# python libraries
+import sys, threading
+
+NAME = "PyChess"
+AUTHOR = "the PyChess authors"
+
+def score(val, moves_best):
+	""" Return the UCI score of a search's result: in centipawns, or in moves to mate once one is found. """
+	if abs(val) < 10000:
+		return "cp {:d}".format(val)
+	# A mate ends the principal variation
+	moves_to_mate = (len(moves_best) + 1) // 2
+	return "mate {:d}".format(moves_to_mate if val > 0 else -moves_to_mate)
+
+
+class UCI:
+	""" Read commands, keep the position and run the search in a thread, so that ``stop`` is heard meanwhile. """
+	def __init__(self, output=sys.stdout):
+		self.output = output
+		self.table_size = 16
+		self.engine = en.Engine(table_size=self.table_size)
+		self.game = gm.Game()
+		self.thread = None
+
+	def send(self, line):
+		print(line, file=self.output, flush=True)
+
+	def loop(self, lines=sys.stdin):
+		""" Answer the commands in ``lines`` until ``quit``. """
+		for line in lines:
+			words = line.split()
+			if not words:
+				continue
+			command, args = words[0], words[1:]
+
+			if command == "uci":
+				self.send("id name " + NAME)
+				self.send("id author " + AUTHOR)
+				self.send("option name Hash type spin default 16 min 1 max 1024")
+				self.send("uciok")
+			elif command == "isready":
+				self.send("readyok")
+			elif command == "setoption":
+				self.set_option(args)
+			elif command == "ucinewgame":
+				self.wait()
+				self.engine.table.clear()
+			elif command == "position":
+				self.wait()
+				self.position(args)
+			elif command == "go":
+				self.wait()
+				self.go(args)
+			elif command == "stop":
+				self.wait(stop=True)
+			elif command == "quit":
+				self.wait(stop=True)
+				break
+		self.engine.close()
+
+	def set_option(self, args):
+		""" Handle ``setoption name <id> value <x>``, ignoring values out of the option's type. """
+		if "value" not in args:
+			return
+		name = " ".join(args[1:args.index("value")]).lower()
+		value = " ".join(args[args.index("value") + 1:])
+		if name == "hash" and value.isdigit():
+			self.wait()
+			self.table_size = max(1, int(value))
+			self.engine = en.Engine(table_size=self.table_size)
+
+	def position(self, args):
+		""" Handle ``position [startpos | fen <fen>] [moves <move> ...]``. """
+		moves = args.index("moves") if "moves" in args else len(args)
+		if args[0] == "fen":
+			self.game = gm.Game.from_fen(" ".join(args[1:moves]))
+		else:
+			self.game = gm.Game()
+
+		for name in args[moves + 1:]:
+			x, y = gm.square_pos(name[:2])
+			n, m = gm.square_pos(name[2:4])
+			self.game.make_move(x, y, n, m, name[4:].upper() or 'Q')
+
+	def go(self, args):
+		""" Handle ``go`` with any of ``depth``, ``movetime``, ``wtime``, ``btime``, ``winc``, ``binc``,
+		``movestogo`` and ``infinite``; times are in milliseconds.
+		"""
+		limits = {}
+		for i, word in enumerate(args[:-1]):
+			if args[i + 1].lstrip('-').isdigit():
+				limits[word] = int(args[i + 1])
+
+		side = 'w' if self.game.turn else 'b'
+		if "movetime" in limits:
+			time_soft = time_hard = limits["movetime"] / 1000
+		elif side + "time" in limits:
+			time_soft, time_hard = en.allocate(limits[side + "time"] / 1000, limits.get(side + "inc", 0) / 1000,
+											   limits.get("movestogo", 30))
+		else:
+			time_soft = time_hard = float("inf")
+
+		self.engine.halted = False
+		self.thread = threading.Thread(target=self.search, args=(self.game.copy(), time_soft, time_hard,
+									   limits.get("depth")), daemon=True)
+		self.thread.start()
+
+	def search(self, game, time_soft, time_hard, depth):
+		val, moves_best = self.engine.search(game, time_soft, time_hard, self.info, depth)
+
+		if moves_best:
+			self.send("bestmove " + en.move_name(moves_best[-1]))
+		else:
+			# Stopped before the first iteration finished
+			restrictions = game.pins_checks()
+			for sq in gm.scan(game.occupied[game.turn]):
+				targets = game.targets_legal(sq, restrictions)
+				if targets:
+					to = next(gm.scan(targets))
+					self.send("bestmove " + gm.square_name(sq & 7, sq >> 3) + gm.square_name(to & 7, to >> 3))
+					return
+			self.send("bestmove 0000")
+
+	def info(self, depth, val, moves_best, elapsed_time):
+		nodes = sum(self.engine.no_nodes) + self.engine.no_nodes_quiescence
+		self.send("info depth {:d} score {:s} nodes {:d} time {:d} nps {:d} pv {:s}".format(depth,
+				  score(val, moves_best), nodes, int(1000*elapsed_time), int(nodes / max(elapsed_time, 0.001)),
+				  " ".join(en.move_name(move) for move in reversed(moves_best))))
+
+	def wait(self, stop=False):
+		""" Wait for the running search, if any, to send its ``bestmove``, stopping it first if asked. """
+		if self.thread is not None:
+			if stop:
+				self.engine.stop()
+			self.thread.join()
+			self.thread = None
+
+
+if __name__ == "__main__":
+	UCI().loop()